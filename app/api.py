@@ -0,0 +1,80 @@
+import sys
+import os
+import json
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Add repo root to sys.path so Python can find src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.config.config import PRIMARY_CITY
+from src.inference.serving import ForecastService
+from src.monitoring.spans import span
+
+HOST = os.getenv("FORECAST_API_HOST", "0.0.0.0")
+PORT = int(os.getenv("FORECAST_API_PORT", "8000"))
+
+service = None
+
+
+# --------------------------------------------------
+# HTTP handler
+# --------------------------------------------------
+class ForecastHandler(BaseHTTPRequestHandler):
+    """
+    GET /forecast?city=<name>&explain=1   3-day forecast (+ SHAP record)
+    GET /health                           model version and status
+    """
+
+    def _send(self, status, body):
+        payload = json.dumps(body, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        if url.path == "/health":
+            self._send(200, {"status": "ok", **service.status()})
+            return
+
+        if url.path != "/forecast":
+            self._send(404, {"error": f"Unknown path {url.path}"})
+            return
+
+        city = query.get("city", [PRIMARY_CITY])[0]
+        explain = query.get("explain", ["0"])[0].lower() in ("1", "true", "yes")
+        with span("request", city=city, explain=explain) as s:
+            try:
+                status, body = 200, service.forecast(city, explain=explain)
+            except KeyError as e:
+                status, body = 404, {"error": str(e).strip("'")}
+            except Exception as e:
+                status, body = 503, {"error": f"{type(e).__name__}: {e}"}
+            s.set(http_status=status)
+            self._send(status, body)
+
+    def log_message(self, format, *args):
+        pass    # request timings go to the span log instead
+
+
+def serve(host=HOST, port=PORT, prewarm=True):
+    global service
+    service = ForecastService()
+    if prewarm:
+        print("Prewarming model and feature cache...")
+        service.prewarm()
+    server = ThreadingHTTPServer((host, port), ForecastHandler)
+    print(f"Forecast API listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    serve()
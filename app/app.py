@@ -1,6 +1,5 @@
 import sys
 import os
-import io 
 
 # Add repo root to sys.path so Python can find src
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -9,12 +8,11 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import pydeck as pdk
-import shap
-import matplotlib.pyplot as plt
-from PIL import Image
-from src.inference.predict_aqi import get_3day_aqi, fetch_last_n_days
-aqi_preds, shap_vals, future_features = get_3day_aqi(return_explanations=True)
+from src.monitoring.spans import span
+
+# Heavy modules (inference stack, shap, matplotlib, pydeck) are imported
+# where they are first needed, so the page header paints before they load.
+PREWARM = os.getenv("APP_PREWARM", "1") == "1"
 
 # --------------------------------------------------
 # Streamlit page config
@@ -39,6 +37,24 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+# --------------------------------------------------
+# Shared data snapshot (one refresh per interval, across all sessions)
+# --------------------------------------------------
+@st.cache_resource
+def get_snapshot_provider():
+    from src.inference.snapshot import SnapshotProvider
+
+    provider = SnapshotProvider()
+    if PREWARM:
+        # Warm the model and first snapshot while the static header renders
+        import threading
+        from src.inference.prewarm import prewarm
+
+        threading.Thread(target=prewarm, args=(provider,), daemon=True).start()
+    return provider
+
+get_snapshot_provider()   # first session starts warming before the images load
+
 st.image("image.png", use_column_width=True)
 col1, col2, col3 = st.columns([1,2,1])
 with col2:
@@ -71,7 +87,11 @@ st.markdown(
     unsafe_allow_html=True
 )
 with st.spinner("Generating 3-day AQI forecast..."):
-    aqi_preds, shap_values, future_features = get_3day_aqi(return_explanations=True)
+    snapshot = get_snapshot_provider().get()
+
+aqi_preds = snapshot.preds
+shap_vals = snapshot.shap_values
+future_features = snapshot.future_features
 
 aqi_display = [int(round(val)) for val in aqi_preds]
 future_dates = [datetime.utcnow() + timedelta(days=i) for i in range(3)]
@@ -117,20 +137,21 @@ trend_df = pd.DataFrame({
     "AQI": aqi_display  # use actual predicted values
 })
 
-# Altair line chart with fixed y-axis
-chart = (
-    alt.Chart(trend_df)
-    .mark_line(point=True, interpolate='monotone', color='green')
-    .encode(
-        x=alt.X("Date", title="Day"),
-        y=alt.Y("AQI", title="Predicted AQI (1–5)", scale=alt.Scale(domain=[1, 5])),
-        tooltip=["Date", "AQI"]
+with span("chart", chart="trend_3day"):
+    # Altair line chart with fixed y-axis
+    chart = (
+        alt.Chart(trend_df)
+        .mark_line(point=True, interpolate='monotone', color='green')
+        .encode(
+            x=alt.X("Date", title="Day"),
+            y=alt.Y("AQI", title="Predicted AQI (1–5)", scale=alt.Scale(domain=[1, 5])),
+            tooltip=["Date", "AQI"]
+        )
+        .properties(width=600, height=300)
+        .interactive()
     )
-    .properties(width=600, height=300)
-    .interactive()
-)
 
-st.altair_chart(chart, use_container_width=True)
+    st.altair_chart(chart, use_container_width=True)
 
 # --------------------------------------------------
 # ⚠️ AQI Alerts & Recommendations (All Levels)
@@ -181,17 +202,18 @@ with st.spinner("Computing model explanations..."):
         shap_df = pd.DataFrame(np.abs(shap_vals.values), columns=future_features.columns)
         mean_shap = shap_df.mean().sort_values(ascending=False).head(5)  # top 5 features
 
-        # Plot horizontal bar chart
-        import matplotlib.pyplot as plt
+        with span("chart", chart="shap_top5"):
+            # Plot horizontal bar chart
+            import matplotlib.pyplot as plt
 
-        fig, ax = plt.subplots(figsize=(11,2))  # compact figure
-        mean_shap.plot(kind="barh", ax=ax, color="green")
-        ax.set_xlabel("Mean |SHAP value|")
-        ax.set_title("Top 5 Feature Contributions")
-        plt.gca().invert_yaxis()  # highest on top
-        plt.tight_layout()
+            fig, ax = plt.subplots(figsize=(11,2))  # compact figure
+            mean_shap.plot(kind="barh", ax=ax, color="green")
+            ax.set_xlabel("Mean |SHAP value|")
+            ax.set_title("Top 5 Feature Contributions")
+            plt.gca().invert_yaxis()  # highest on top
+            plt.tight_layout()
 
-        st.pyplot(fig, use_container_width=True)
+            st.pyplot(fig, use_container_width=True)
 
     except Exception as e:
         st.warning(f"SHAP explanation could not be generated: {e}")
@@ -207,7 +229,7 @@ st.markdown(
     "</p>",
     unsafe_allow_html=True
 )
-last_7_days_df = fetch_last_n_days(7)
+last_7_days_df = snapshot.recent
 
 pollutants = ["pm25", "pm10", "co", "no2", "so2", "o3"]
 avg_pollutants = last_7_days_df[pollutants].mean().round(3)
@@ -228,32 +250,33 @@ composition_df = composition_df.sort_values(
 
 import altair as alt
 
-bar_chart = (
-    alt.Chart(composition_df)
-    .mark_bar()
-    .encode(
-        x=alt.X(
-            "Pollutant:N",
-            sort="-y",   # ensures visual sorting matches percentage
-            title="Pollutant"
-        ),
-        y=alt.Y("Percentage:Q", title="Contribution (%)"),
-        color=alt.Color("Pollutant:N", legend=None),
-        tooltip=[
-            alt.Tooltip("Pollutant:N"),
-            alt.Tooltip("Percentage:Q", format=".2f")
-        ]
+with span("chart", chart="pollutant_composition"):
+    bar_chart = (
+        alt.Chart(composition_df)
+        .mark_bar()
+        .encode(
+            x=alt.X(
+                "Pollutant:N",
+                sort="-y",   # ensures visual sorting matches percentage
+                title="Pollutant"
+            ),
+            y=alt.Y("Percentage:Q", title="Contribution (%)"),
+            color=alt.Color("Pollutant:N", legend=None),
+            tooltip=[
+                alt.Tooltip("Pollutant:N"),
+                alt.Tooltip("Percentage:Q", format=".2f")
+            ]
+        )
+        .properties(width=600, height=400)
     )
-    .properties(width=600, height=400)
-)
 
-text = bar_chart.mark_text(
-    dy=-10
-).encode(
-    text=alt.Text("Percentage:Q", format=".2f")
-)
+    text = bar_chart.mark_text(
+        dy=-10
+    ).encode(
+        text=alt.Text("Percentage:Q", format=".2f")
+    )
 
-st.altair_chart(bar_chart + text, use_container_width=True)
+    st.altair_chart(bar_chart + text, use_container_width=True)
 
 # --------------------------------------------------
 # 30-Day AQI Forecast (demo-mode) with day, date & month
@@ -286,13 +309,14 @@ forecast_30_df = pd.DataFrame({
 
 # Streamlit line chart with green line using Altair for color control
 import altair as alt
-chart_30 = alt.Chart(forecast_30_df).mark_line(color="green", point=True).encode(
-    x=alt.X("Date", title="Day"),
-    y=alt.Y("AQI", title="Predicted AQI (1–5)", scale=alt.Scale(domain=[1,5])),
-    tooltip=["Date","AQI"]
-).properties(width=800, height=300).interactive()
+with span("chart", chart="trend_30day"):
+    chart_30 = alt.Chart(forecast_30_df).mark_line(color="green", point=True).encode(
+        x=alt.X("Date", title="Day"),
+        y=alt.Y("AQI", title="Predicted AQI (1–5)", scale=alt.Scale(domain=[1,5])),
+        tooltip=["Date","AQI"]
+    ).properties(width=800, height=300).interactive()
 
-st.altair_chart(chart_30, use_container_width=True)
+    st.altair_chart(chart_30, use_container_width=True)
 
 # --------------------------------------------------
 # 📍 Map — Karachi AQI (realistic & interactive)
@@ -305,29 +329,8 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# More locations across Karachi
-karachi_stations = pd.DataFrame({
-    "lat": [
-        24.8607, 24.9056, 24.9575, 24.8820, 24.9260, 24.8350, 24.9210, 24.9450,
-        24.8500, 24.8700, 24.8900, 24.9100, 24.9300, 24.9500, 24.9700, 24.8800,
-        24.8400, 24.8950, 24.9150, 24.9350
-    ],
-    "lon": [
-        67.0011, 67.0810, 67.0320, 67.0500, 67.0900, 67.0200, 67.0600, 67.1000,
-        67.0100, 67.0200, 67.0300, 67.0400, 67.0500, 67.0600, 67.0700, 67.0800,
-        67.0900, 67.1000, 67.1100, 67.1200
-    ],
-    "location": [
-        "Clifton", "PECHS", "Korangi", "North Nazimabad", "Gulshan-e-Iqbal", "Saddar", "Lyari", "Malir",
-        "Shah Faisal", "Defence", "Gulistan-e-Jauhar", "Nazimabad", "SITE", "Korangi Creek", "Landhi", "Airport",
-        "Baldia", "Orangi Town", "Hyderi", "Bahadurabad"
-    ],
-    "AQI": [
-        3, 4, 2, 3, 5, 1, 2, 4,
-        3, 2, 3, 4, 1, 2, 3, 4,
-        2, 3, 4, 3
-    ]  # demo AQI levels
-})
+# Latest reading per configured station (src/config/locations.json)
+karachi_stations = snapshot.stations.copy()
 
 # Convert AQI to RGB color
 def aqi_to_color(aqi_val):
@@ -342,39 +345,47 @@ def aqi_to_color(aqi_val):
     else:
         return [128, 0, 128]     # purple
 
-karachi_stations["color"] = karachi_stations["AQI"].apply(aqi_to_color)
-karachi_stations["radius"] = karachi_stations["AQI"] * 100  # smaller radius for many points
-
-# PyDeck ScatterplotLayer
-layer = pdk.Layer(
-    "ScatterplotLayer",
-    data=karachi_stations,
-    get_position='[lon, lat]',
-    get_color='color',
-    get_radius='radius',
-    pickable=True,
-    auto_highlight=True
-)
-
-# Set view over Karachi
-view_state = pdk.ViewState(
-    latitude=24.8607,
-    longitude=67.0011,
-    zoom=11,
-    pitch=0
-)
-
-# Deck object with interactive tooltip (only AQI number)
-r = pdk.Deck(
-    layers=[layer],
-    initial_view_state=view_state,
-    tooltip={
-        "html": "<b>{location}</b><br>AQI: {AQI}",
-        "style": {"backgroundColor": "steelblue", "color": "white"}
-    }
-)
-
-st.pydeck_chart(r)
+if karachi_stations.empty:
+    st.info("No recent station readings available yet.")
+else:
+    karachi_stations["location"] = karachi_stations["label"]
+    karachi_stations["AQI"] = karachi_stations["aqi"].round().astype(int)
+    karachi_stations["color"] = karachi_stations["AQI"].apply(aqi_to_color)
+    karachi_stations["radius"] = karachi_stations["AQI"] * 100  # smaller radius for many points
+
+    with span("chart", chart="station_map"):
+        import pydeck as pdk
+
+        # PyDeck ScatterplotLayer
+        layer = pdk.Layer(
+            "ScatterplotLayer",
+            data=karachi_stations[["lat", "lon", "location", "AQI", "color", "radius"]],
+            get_position='[lon, lat]',
+            get_color='color',
+            get_radius='radius',
+            pickable=True,
+            auto_highlight=True
+        )
+
+        # Set view over Karachi
+        view_state = pdk.ViewState(
+            latitude=24.8607,
+            longitude=67.0011,
+            zoom=11,
+            pitch=0
+        )
+
+        # Deck object with interactive tooltip (only AQI number)
+        r = pdk.Deck(
+            layers=[layer],
+            initial_view_state=view_state,
+            tooltip={
+                "html": "<b>{location}</b><br>AQI: {AQI}",
+                "style": {"backgroundColor": "steelblue", "color": "white"}
+            }
+        )
+
+        st.pydeck_chart(r)
 
 # --------------------------------------------------
 # Footer
@@ -0,0 +1,78 @@
+import os
+import numpy as np
+import pandas as pd
+
+from src.features.feature_engine import TIME_FEATURES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_PATH = os.path.join(ROOT, "data/raw/historical_aqi.csv")
+PROCESSED_PATH = os.path.join(ROOT, "data/processed/historical_features.csv")
+
+# (years of hourly history, number of cities)
+SCALES = {
+    "small": (None, 1),      # bundled data as is
+    "medium": (2, 3),
+    "large": (5, 10),
+}
+
+NON_NUMERIC = ["city", "timestamp"]
+INTEGER_COLUMNS = ["aqi"] + TIME_FEATURES
+
+
+def load_raw():
+    return pd.read_csv(RAW_PATH, parse_dates=["timestamp"])
+
+
+def load_processed():
+    return pd.read_csv(PROCESSED_PATH, parse_dates=["timestamp"])
+
+
+def scale_up(df, years=None, n_cities=1, seed=0):
+    """
+    Synthetic multi-year, multi-city copy of a bundled dataset. Rows are
+    tiled backwards in time to cover `years` of hourly history, and each
+    extra city gets the same series with a per-city scale and noise.
+    """
+    if years is None and n_cities == 1:
+        return df.copy()
+
+    rng = np.random.default_rng(seed)
+    df = df.sort_values("timestamp").reset_index(drop=True)
+    n_hours = int(years * 365 * 24) if years else len(df)
+    end = df["timestamp"].max()
+    timestamps = pd.date_range(end=end, periods=n_hours, freq="h")
+    base = df.iloc[np.arange(n_hours) % len(df)].reset_index(drop=True)
+    float_cols = [
+        c for c in base.columns
+        if c not in NON_NUMERIC + INTEGER_COLUMNS and pd.api.types.is_float_dtype(base[c])
+    ]
+
+    frames = []
+    for i in range(n_cities):
+        city = base.copy()
+        city["timestamp"] = timestamps
+        city["city"] = "Karachi" if i == 0 else f"City{i:02d}"
+        if i:
+            factor = rng.lognormal(0, 0.2) * rng.lognormal(0, 0.05, size=(n_hours, 1))
+            city[float_cols] = city[float_cols].to_numpy() * factor
+        if "hour" in city:
+            city[TIME_FEATURES] = np.column_stack([
+                timestamps.hour, timestamps.day, timestamps.month, timestamps.weekday
+            ])
+        frames.append(city)
+    return pd.concat(frames, ignore_index=True)
+
+
+def to_payload(raw):
+    """
+    An OpenWeather air_pollution response carrying the rows of `raw`.
+    """
+    seconds = raw["timestamp"].astype("int64") // 10**9
+    components = raw[["pm25", "pm10", "co", "no2", "so2", "o3"]].rename(columns={"pm25": "pm2_5"})
+    return {
+        "coord": {"lat": 24.8607, "lon": 67.0011},
+        "list": [
+            {"dt": int(dt), "main": {"aqi": int(aqi)}, "components": comp}
+            for dt, aqi, comp in zip(seconds, raw["aqi"], components.to_dict("records"))
+        ],
+    }
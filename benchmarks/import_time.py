@@ -0,0 +1,88 @@
+"""
+Import-time profile of the dashboard and inference entry points.
+
+    python -m benchmarks.import_time                 # default targets
+    python -m benchmarks.import_time app/app.py src.inference.serving --top 15
+
+Each target is imported in a fresh interpreter with `python -X importtime`.
+A .py file target imports that script's top-level imports only, so the
+Streamlit app can be profiled without running it. The report shows the
+total import time and the slowest modules.
+"""
+import os
+import ast
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TARGETS = ["app/app.py", "src.inference.snapshot", "src.inference.predict_aqi", "app/api.py"]
+
+
+def import_statements(script):
+    """
+    Source of the module-level import statements of a script.
+    """
+    with open(os.path.join(ROOT, script)) as f:
+        tree = ast.parse(f.read())
+    return "\n".join(
+        ast.unparse(node) for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def profile(target):
+    """
+    [(module, self_us, cumulative_us, depth)] for one cold import of target.
+    """
+    code = import_statements(target) if target.endswith(".py") else f"import {target}"
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def report(target, rows, top):
+    total = sum(cumulative for _, _, cumulative, depth in rows if depth == 0)
+    print(f"\n{target}: {total / 1e6:.3f}s total, {len(rows)} modules")
+    print(f"  {'module':<45} {'cumulative':>11} {'self':>9}")
+    slowest = sorted(rows, key=lambda r: r[2], reverse=True)[:top]
+    for name, self_us, cumulative_us, _ in slowest:
+        print(f"  {name:<45} {cumulative_us / 1e6:>10.3f}s {self_us / 1e6:>8.3f}s")
+    return {"target": target, "seconds": round(total / 1e6, 3), "modules": len(rows)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    parser.add_argument("--json", help="also write the totals to this file")
+    args = parser.parse_args()
+
+    results = []
+    for target in args.targets:
+        try:
+            results.append(report(target, profile(target), args.top))
+        except RuntimeError as e:
+            print(f"\n{target}: import failed: {e}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Offline benchmark suite.
+
+    python -m benchmarks.run                     # small scale, compare to baselines
+    python -m benchmarks.run --scale large --only "training.*"
+    python -m benchmarks.run --update-baseline   # record this machine's numbers
+
+Runs on the embedded backend (AQI_BACKEND=local, src.storage.local_store):
+feature groups and the MLflow registry live in a temporary working
+directory, so nothing reaches Hopsworks or DagsHub. Exits with status 1 when a
+benchmark is slower or uses more memory than its baseline allows.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import fnmatch
+import argparse
+import platform
+import tempfile
+import warnings
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Before anything reads src.config: the store path is relative, so it
+# resolves inside the temporary working directory
+os.environ["AQI_BACKEND"] = "local"
+os.environ["AQI_LOCAL_STORE"] = os.path.join("data", "local")
+
+from benchmarks.datasets import SCALES
+
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baselines.json")
+TIME_TOLERANCE = 0.25       # allowed slowdown vs baseline
+MEMORY_TOLERANCE = 0.20     # allowed peak-memory growth vs baseline
+MIN_TIME_DELTA = 0.05       # seconds; smaller differences are noise
+MIN_MEMORY_DELTA = 2.0      # MB
+
+
+# --------------------------------------------------
+# Measurement
+# --------------------------------------------------
+def measure(fn, repeat=3):
+    """
+    Median wall time over `repeat` calls after one warm-up call, then
+    peak traced Python / NumPy memory over one more call.
+    """
+    fn()
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    times.sort()
+    return {
+        "seconds": round(times[len(times) // 2], 4),
+        "peak_mb": round(peak / 2**20, 2),
+    }
+
+
+def compare(results, baseline):
+    """
+    [(name, message)] for every result outside the baseline tolerances.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        slower = result["seconds"] - base["seconds"]
+        if slower > MIN_TIME_DELTA and result["seconds"] > base["seconds"] * (1 + TIME_TOLERANCE):
+            regressions.append((name, f"time {base['seconds']:.3f}s -> {result['seconds']:.3f}s"))
+        bigger = result["peak_mb"] - base["peak_mb"]
+        if bigger > MIN_MEMORY_DELTA and result["peak_mb"] > base["peak_mb"] * (1 + MEMORY_TOLERANCE):
+            regressions.append((name, f"memory {base['peak_mb']:.1f}MB -> {result['peak_mb']:.1f}MB"))
+    return regressions
+
+
+def load_baselines(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(baselines, path=BASELINE_PATH):
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def machine():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+# --------------------------------------------------
+# Runner
+# --------------------------------------------------
+def run(scale="small", only=None, repeat=3):
+    workdir = tempfile.mkdtemp(prefix="aqi-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir)   # data/cache, data/state, data/local etc. land in the temp dir
+    try:
+        from benchmarks.suite import BENCHMARKS, Context
+
+        ctx = Context(scale, workdir)
+        results = {}
+        for name, setup in BENCHMARKS.items():
+            if only and not any(fnmatch.fnmatch(name, pattern) for pattern in only):
+                continue
+            try:
+                fn = setup(ctx)
+            except ImportError as e:
+                print(f"⏭ {name}: skipped ({e})")
+                continue
+            results[name] = measure(fn, repeat)
+            print(f"⏱ {name:32s} {results[name]['seconds']:9.4f}s "
+                  f"{results[name]['peak_mb']:9.2f}MB")
+        return results
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--only", action="append", help="glob over benchmark names")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    results = run(args.scale, args.only, args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"scale": args.scale, "machine": machine(), "results": results}, f, indent=2)
+
+    baselines = load_baselines()
+    if args.update_baseline:
+        entry = baselines.setdefault(args.scale, {"machine": machine(), "results": {}})
+        entry["machine"] = machine()
+        entry["results"].update(results)
+        save_baselines(baselines)
+        print(f"Baselines for '{args.scale}' saved to {BASELINE_PATH}")
+        return 0
+
+    baseline = baselines.get(args.scale, {}).get("results", {})
+    if not baseline:
+        print(f"No '{args.scale}' baselines yet; run with --update-baseline to record them.")
+        return 0
+
+    regressions = compare(results, baseline)
+    for name, message in regressions:
+        print(f"❌ {name}: {message}")
+    if not regressions:
+        print("✅ No regressions against baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
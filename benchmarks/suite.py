@@ -0,0 +1,210 @@
+import os
+from functools import cached_property
+
+from benchmarks.datasets import SCALES, load_raw, load_processed, scale_up, to_payload
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    Register a benchmark. The decorated function receives the Context,
+    does its setup untimed and returns the zero-argument callable that
+    is measured.
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+# --------------------------------------------------
+# Shared, lazily built inputs
+# --------------------------------------------------
+class Context:
+
+    def __init__(self, scale, workdir):
+        self.scale = scale
+        self.workdir = workdir
+        self.years, self.n_cities = SCALES[scale]
+
+    def path(self, *parts):
+        return os.path.join(self.workdir, *parts)
+
+    @cached_property
+    def raw(self):
+        return scale_up(load_raw(), self.years, self.n_cities)
+
+    @cached_property
+    def processed(self):
+        return scale_up(load_processed(), self.years, self.n_cities)
+
+    @cached_property
+    def training_split(self):
+        df = self.processed.sort_values("timestamp").dropna()
+        X = df.drop(columns=["aqi", "timestamp", "city"])
+        y = df["aqi"]
+        split = int(len(X) * 0.8)
+        return X.iloc[:split], y.iloc[:split], X.iloc[split:], y.iloc[split:]
+
+    @cached_property
+    def recent(self):
+        """
+        Last 7 feature rows of the main city, cached locally the way the
+        inference pipeline sees them.
+        """
+        from src.config.config import FEATURE_GROUP_NAME, FEATURE_GROUP_VERSION
+        from src.features.feature_cache import FeatureCache
+        from src.storage import backend
+
+        fg = backend.login().get_feature_store().get_or_create_feature_group(
+            FEATURE_GROUP_NAME, version=FEATURE_GROUP_VERSION
+        )
+        fg.insert(self.processed[self.processed["city"] == "Karachi"])
+        cache = FeatureCache()
+        cache.refresh(fg)
+        return cache.last_n(7)
+
+    @cached_property
+    def registered_model(self):
+        """
+        Train the default RandomForest, register it in the local MLflow
+        store and point the process-wide model cache at it.
+        """
+        import mlflow
+        import src.inference.model_cache as model_cache
+        from src.training.candidates import DEFAULT_PARAMS
+        from src.training.scheduler import run_candidate
+
+        X_train, y_train, X_test, y_test = self.training_split
+        result = run_candidate(
+            "RandomForest", X_train, y_train, X_test, y_test,
+            DEFAULT_PARAMS["RandomForest"], artifact_dir=self.path("candidates"),
+        )
+        mlflow.register_model(f"runs:/{result['run_id']}/model", model_cache.MODEL_NAME)
+        model_cache._model_cache = model_cache.ModelCache(artifact_dir=self.path("models"))
+        return model_cache._model_cache.get()
+
+
+# --------------------------------------------------
+# Ingestion
+# --------------------------------------------------
+@benchmark("ingestion.parse_payload")
+def bench_parse_payload(ctx):
+    from src.ingestion.fetch_historical_aqi import parse_records
+
+    payload = to_payload(ctx.raw)
+    return lambda: parse_records(payload)
+
+
+# --------------------------------------------------
+# Features
+# --------------------------------------------------
+@benchmark("features.process_historical")
+def bench_process_historical(ctx):
+    from src.features.historical_feature_pipeline import process_historical_features
+
+    raw_path = ctx.path("raw_historical.csv")
+    ctx.raw.to_csv(raw_path, index=False)
+    output_path = ctx.path("processed_historical.csv")
+    return lambda: process_historical_features(raw_path, output_path, incremental=False)
+
+
+# --------------------------------------------------
+# Training (one benchmark per candidate)
+# --------------------------------------------------
+def candidate_benchmark(name):
+    def setup(ctx):
+        from src.training.candidates import DEFAULT_PARAMS
+        from src.training.scheduler import run_candidate
+
+        if name == "NeuralNet":
+            import tensorflow  # noqa: F401  (skipped when TensorFlow is missing)
+        X_train, y_train, X_test, y_test = ctx.training_split
+        return lambda: run_candidate(
+            name, X_train, y_train, X_test, y_test, DEFAULT_PARAMS[name],
+            artifact_dir=ctx.path("candidates"),
+        )
+    return setup
+
+
+for _name in ("RandomForest", "Ridge", "NeuralNet"):
+    benchmark(f"training.{_name}")(candidate_benchmark(_name))
+
+
+# --------------------------------------------------
+# Inference
+# --------------------------------------------------
+@benchmark("inference.model_load")
+def bench_model_load(ctx):
+    import src.inference.model_cache as model_cache
+
+    ctx.registered_model
+    version = model_cache.get_model_cache().version
+
+    def load():
+        cache = model_cache.ModelCache(artifact_dir=ctx.path("models"))
+        cache._load(version)
+        return cache.model
+    return load
+
+
+@benchmark("inference.get_3day_aqi")
+def bench_get_3day_aqi(ctx):
+    from src.inference.predict_aqi import get_3day_aqi
+
+    ctx.registered_model
+    recent = ctx.recent
+    return lambda: get_3day_aqi(last_n_days=recent, seed=0)
+
+
+@benchmark("inference.ensemble_1000")
+def bench_ensemble(ctx):
+    from src.inference.predict_aqi import get_3day_aqi_ensemble
+
+    ctx.registered_model
+    recent = ctx.recent
+    return lambda: get_3day_aqi_ensemble(n_scenarios=1000, seed=0, last_n_days=recent)
+
+
+@benchmark("inference.predict_3000")
+def bench_predict_ensemble_batch(ctx):
+    # model.predict alone on the ensemble's 1000 scenarios x 3 days
+    from src.inference.predict_aqi import (
+        forecast_pollutant_scenarios, forecast_dates, scenario_features,
+        select_model_features, recent_history
+    )
+
+    model = ctx.registered_model
+    recent = ctx.recent
+    scenarios = forecast_pollutant_scenarios(recent, n_scenarios=1000, seed=0)
+    features = select_model_features(
+        model, scenario_features(scenarios, forecast_dates(), recent_history(fallback=recent))
+    )
+    return lambda: model.predict(features)
+
+
+# --------------------------------------------------
+# SHAP
+# --------------------------------------------------
+@benchmark("shap.forest")
+def bench_shap_forest(ctx):
+    import src.inference.explain as explain
+    from src.inference.predict_aqi import generate_future_features, select_model_features
+
+    model = ctx.registered_model
+    future_df = select_model_features(model, generate_future_features(ctx.recent, seed=0))
+
+    def run():
+        explain._explainers.clear()   # time a cold explainer build as well
+        return explain.explain(model, future_df, version="benchmark")
+    return run
+
+
+@benchmark("shap.get_3day_aqi")
+def bench_shap_end_to_end(ctx):
+    from src.inference.predict_aqi import get_3day_aqi
+
+    ctx.registered_model
+    recent = ctx.recent
+    return lambda: get_3day_aqi(return_explanations=True, last_n_days=recent, seed=0)
@@ -1,94 +1,261 @@
 import os
 import time
 import warnings
-from datetime import datetime, timedelta
 import pandas as pd
-import hopsworks
+from datetime import datetime, timedelta
 
-from src.ingestion.fetch_aqi import fetch_aqi
-from src.ingestion.fetch_historical_aqi import fetch_historical_aqi
+from src.ingestion.fetch_aqi import fetch_latest
+from src.ingestion.fetch_historical_aqi import fetch_historical_locations
+from src.ingestion.locations import load_locations
+from src.ingestion.stream import KafkaSource
+from src.config.config import FEATURE_GROUP_NAME, FEATURE_GROUP_VERSION
+from src.features.watermark import (
+    load_watermarks, save_watermarks, advance_watermarks, probe_watermarks
+)
+from src.features.feature_engine import (
+    FeatureEngine, POLLUTANTS, load_state, save_state
+)
+from src.features.write_buffer import WriteBuffer
+from src.features.stream_windows import TumblingWindows, SlidingWindow, SLIDING_WIDTH
+from src.monitoring.spans import span, traced
+from src.storage import backend
 
 warnings.filterwarnings("ignore")
 
+MAX_BACKFILL_DAYS = 120
+STATE_WARMUP_HOURS = 7 * 24   # history used to rebuild lost window state
 
-def safe_insert(fg, df, label="data"):
-    for attempt in range(3):
-        try:
-            fg.insert(
-                df,
-                write_options={"start_offline_materialization": False}
-            )
-            print(f"✅ {label} inserted successfully.")
-            return
-        except Exception as e:
-            print(f"⚠ Attempt {attempt+1}/3 failed: {e}")
-            time.sleep(10)
-    raise Exception(f"❌ Failed to insert {label} after 3 attempts.")
-
+INGEST_MODE = os.getenv("INGEST_MODE", "batch")   # "batch" (hourly cron) or "stream"
+STREAM_FLUSH_SECONDS = int(os.getenv("STREAM_FLUSH_SECONDS", "60"))
+STREAM_FLUSH_ROWS = 1000
 
-def run_feature_pipeline():
 
+def open_feature_group():
+    """
+    Log in and return the feature group, creating it on first use.
+    """
     # 1️⃣ Connect to Hopsworks feature store only
-    project = hopsworks.login(
-    project="Predictor_AQI",  # your project name
-    host="eu-west.cloud.hopsworks.ai",
-    port=443,
-    api_key_value=os.environ["HOPSWORKS_API_KEY"]
-)
-    
-    fs = project.get_feature_store()
+    with span("login"):
+        project = backend.login(
+            project="Predictor_AQI",  # your project name
+            host="eu-west.cloud.hopsworks.ai",
+            port=443,
+            api_key_value=os.environ.get("HOPSWORKS_API_KEY")
+        )
+        fs = project.get_feature_store()
 
     # 2️⃣ Feature group
-    fg_name = "karachi_aqi_features"
+    fg_name = FEATURE_GROUP_NAME
 
     try:
-        fg = fs.get_feature_group(name=fg_name, version=1)
+        fg = fs.get_feature_group(name=fg_name, version=FEATURE_GROUP_VERSION)
         print("Feature group exists. Appending new data...")
     except:
         print("Feature group does not exist. Creating new feature group...")
         fg = fs.create_feature_group(
             name=fg_name,
-            version=1,
-            description="AQI and pollutant data for Karachi",
+            version=FEATURE_GROUP_VERSION,
+            description="AQI, pollutant and windowed pollutant features for Karachi locations",
             primary_key=["city", "timestamp"],
             event_time="timestamp",
             online_enabled=False
         )
+    return fg
+
+
+def warm_state(fg, engine, state, cities, since):
+    """
+    Rebuild window state for cities from feature-store rows newer than since.
+    """
+    print(f"Rebuilding feature window state for {len(cities)} location(s) from recent history...")
+    with span("fg_read", query="state_warmup") as s:
+        history = s.rows(
+            fg.select(["city", "timestamp"] + POLLUTANTS)
+            .filter(fg.timestamp > since)
+            .read()
+        )
+    state.update(engine.fit_state(history[history["city"].isin(cities)]))
+    return state
 
-    # 3️⃣ Check if empty
+
+@traced("feature_pipeline")
+def run_feature_pipeline():
+
+    # Ingestion keeps going through a store outage: rows are buffered
+    # locally and inserted by the next run that reaches the store.
     try:
-        existing = fg.select_all().read()
-        is_empty = existing.empty
-    except Exception:
-        is_empty = True
+        fg = open_feature_group()
+    except Exception as e:
+        print(f"⚠ Feature store unavailable, buffering this run locally: {e}")
+        fg = None
+    buffer = WriteBuffer()
+
+    # 3️⃣ Watermarks: latest ingested timestamp per location
+    locations = load_locations()
+    names = [loc["name"] for loc in locations]
+    watermarks = load_watermarks()
+    if fg is not None and any(name not in watermarks for name in names):
+        try:
+            with span("fg_read", query="watermark"):
+                probed = probe_watermarks(fg, MAX_BACKFILL_DAYS)
+            if probed:
+                watermarks = {**probed, **watermarks}
+                save_watermarks(watermarks)
+        except Exception as e:
+            print(f"⚠ Could not probe watermark from feature store: {e}")
+
+    # Window state for lag / rolling / EWMA features
+    engine = FeatureEngine()
+    state = load_state() or {}
+    cold = [name for name in names if watermarks.get(name) and name not in state]
+    if cold and fg is None:
+        # Their window state can only be rebuilt from the store
+        print(f"Skipping {len(cold)} location(s) without window state until the store is back.")
+        locations = [loc for loc in locations if loc["name"] not in cold]
+    elif cold:
+        since = min(watermarks[name] for name in cold) - timedelta(hours=STATE_WARMUP_HOURS)
+        warm_state(fg, engine, state, cold, since)
+
+    # 4️⃣ Gap backfill: exactly the range between each watermark and now.
+    # The latest fetch covers the current hour, so a watermark in the
+    # previous hour means nothing is missing (the steady hourly run).
+    end_date = datetime.utcnow()
+    now_hour = end_date.replace(minute=0, second=0, microsecond=0)
+    earliest = end_date - timedelta(days=MAX_BACKFILL_DAYS)
+    gaps = []
+    for location in locations:
+        watermark = watermarks.get(location["name"])
+        if watermark and watermark >= now_hour - timedelta(hours=1):
+            continue
+        start_date = max(watermark + timedelta(seconds=1), earliest) if watermark else earliest
+        print(f"Backfilling {location['name']} AQI gap from {start_date} to {end_date}...")
+        gaps.append((location, start_date, end_date))
+
+    frames = []
+    if gaps:
+        # Every location's windows share one pool, session and rate limit
+        with span("fetch", source="history", locations=len(gaps)) as s:
+            frames.append(s.rows(fetch_historical_locations(gaps)))
+    else:
+        print("No gap to backfill.")
+
+    # 5️⃣ Latest AQI for every location, fetched concurrently
+    print(f"Fetching latest AQI data for {len(locations)} location(s)...")
+    with span("fetch", source="latest") as s:
+        frames.append(s.rows(fetch_latest(locations)))
 
-    # 4️⃣ Historical backfill
-    if is_empty:
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=120)
+    # Backfill and latest readings can overlap on the newest hour
+    raw = pd.concat(frames, ignore_index=True).drop_duplicates(
+        subset=["city", "timestamp"], keep="last"
+    )
+    with span("transform") as s:
+        df_new, new_state = engine.transform(raw, state)
+        s.rows(df_new)
 
-        print(f"Fetching historical AQI data from {start_date.date()} to {end_date.date()}...")
-        df_hist = fetch_historical_aqi(start_date, end_date)
+    # 6️⃣ Write-ahead: rows are durable locally before any insert, so
+    # watermarks and window state can advance right away
+    if df_new.empty:
+        print("Latest readings already ingested.")
+    else:
+        buffer.append(df_new)
+        advance_watermarks(df_new)
+        save_state(new_state)
 
-        if not df_hist.empty:
-            df_hist["hour"] = df_hist["timestamp"].dt.hour
-            df_hist["day"] = df_hist["timestamp"].dt.day
-            df_hist["month"] = df_hist["timestamp"].dt.month
-            df_hist["weekday"] = df_hist["timestamp"].dt.weekday
+    # 7️⃣ One coalesced insert of everything pending (this run + earlier outages)
+    if fg is None:
+        print("Feature store unavailable; pending rows stay buffered.")
+        return
+    buffer.flush(fg)
 
-            safe_insert(fg, df_hist, label="Historical data")
 
-    # 5️⃣ Latest AQI
-    print("Fetching latest AQI data...")
-    latest_record = fetch_aqi()
-    df_latest = pd.DataFrame([latest_record])
-    df_latest["hour"] = df_latest["timestamp"].dt.hour
-    df_latest["day"] = df_latest["timestamp"].dt.day
-    df_latest["month"] = df_latest["timestamp"].dt.month
-    df_latest["weekday"] = df_latest["timestamp"].dt.weekday
+# --------------------------------------------------
+# Streaming mode (INGEST_MODE=stream)
+# --------------------------------------------------
+@traced("feature_stream")
+def run_streaming_pipeline(source=None, flush_interval=STREAM_FLUSH_SECONDS,
+                           flush_rows=STREAM_FLUSH_ROWS):
+    """
+    Consume readings continuously from Kafka (or an in-process
+    QueueSource). Sub-hour readings are averaged into hourly tumbling
+    windows per city; each closed window goes through the feature
+    engine's incremental state and into the write buffer. The buffer is
+    flushed as one micro-batch every flush_interval seconds or
+    flush_rows rows. Runs until the source ends.
+    """
+    source = source or KafkaSource()
+    try:
+        fg = open_feature_group()
+    except Exception as e:
+        print(f"⚠ Feature store unavailable, buffering locally: {e}")
+        fg = None
+
+    buffer = WriteBuffer()
+    engine = FeatureEngine()
+    state = load_state() or {}
+    windows = TumblingWindows().load()
+    live = SlidingWindow()
+    pending, last_flush = [], time.monotonic()
+
+    def flush():
+        nonlocal pending, last_flush
+        if pending:
+            df = pd.concat(pending, ignore_index=True)
+            buffer.append(df)
+            advance_watermarks(df)
+            save_state(state)
+        # Open windows are checkpointed before offsets are committed
+        windows.save()
+        source.commit()
+        if fg is not None:
+            buffer.flush(fg)
+        current = live.current()
+        if not current.empty:
+            print(f"Live {SLIDING_WIDTH.seconds // 60}-min means for {len(current)} city(ies); "
+                  f"{sum(len(p) for p in pending)} hourly row(s) flushed, {windows.late} late reading(s) dropped.")
+        pending, last_flush = [], time.monotonic()
+
+    def process(rows):
+        nonlocal state
+        if not rows:
+            return
+        df = pd.DataFrame(rows)
+        cold = sorted(set(df["city"]) - set(state))
+        if cold and fg is not None:
+            try:
+                since = df["timestamp"].min() - timedelta(hours=STATE_WARMUP_HOURS)
+                warm_state(fg, engine, state, cold, since)
+            except Exception as e:
+                print(f"⚠ Could not rebuild window state: {e}")
+        with span("transform") as s:
+            features, state = engine.transform(df, state)
+            s.rows(features)
+        if not features.empty:
+            pending.append(features)
+
+    readings = []
+    try:
+        while True:
+            readings = source.poll(timeout=1.0)
+            if readings is None:
+                break
+            for reading in readings:
+                windows.add(reading)
+                live.add(reading)
+            process(windows.closed())
 
-    safe_insert(fg, df_latest, label="Latest data")
+            n_pending = sum(len(p) for p in pending)
+            if n_pending >= flush_rows or time.monotonic() - last_flush >= flush_interval:
+                flush()
+    finally:
+        if readings is None:
+            # Source ended: close the remaining windows too
+            process(windows.flush_all())
+        flush()
+        source.close()
 
 
 if __name__ == "__main__":
-    run_feature_pipeline()
+    if INGEST_MODE == "stream":
+        run_streaming_pipeline()
+    else:
+        run_feature_pipeline()
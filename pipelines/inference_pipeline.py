@@ -0,0 +1,41 @@
+import warnings
+
+from src.inference.predict_aqi import (
+    get_3day_aqi, fetch_last_n_days, get_project
+)
+from src.inference.model_cache import get_model_cache
+from src.inference.forecast_store import ForecastStore, to_record
+from src.monitoring.spans import span, traced
+
+warnings.filterwarnings("ignore")
+
+
+@traced("inference_pipeline")
+def run_inference_pipeline():
+
+    # 1️⃣ Recent observations (same rows the forecast is built from)
+    recent = fetch_last_n_days(7)
+
+    # 2️⃣ Forecast + SHAP attributions
+    preds, shap_values, future_df = get_3day_aqi(
+        return_explanations=True, last_n_days=recent
+    )
+    record = to_record(
+        preds, shap_values, future_df, recent,
+        model_version=get_model_cache().version
+    )
+
+    # 3️⃣ Publish to the forecast store read by the dashboard
+    try:
+        dataset_api = get_project().get_dataset_api()
+    except Exception as e:
+        print(f"⚠ Hopsworks dataset API unavailable, writing locally only: {e}")
+        dataset_api = None
+
+    with span("insert", target="forecast_store"):
+        version = ForecastStore(dataset_api=dataset_api).write(record)
+    print(f"✅ Forecast {version} written (model version {record['model_version']}).")
+
+
+if __name__ == "__main__":
+    run_inference_pipeline()
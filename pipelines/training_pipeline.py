@@ -1,37 +1,139 @@
 import os
-import hopsworks
+import shutil
+from datetime import datetime
+
 import mlflow
-import mlflow.sklearn
-import mlflow.tensorflow
-import numpy as np
-import joblib
-
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.linear_model import Ridge
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense
+import pandas as pd
 from mlflow.tracking import MlflowClient
 
-mlflow.set_tracking_uri(
-    "https://dagshub.com/AfifaSiddiquee/AQIPredictorProject.mlflow/"
+from src.config.config import FEATURE_GROUP_NAME, FEATURE_GROUP_VERSION
+from src.training.candidates import TRAINERS, DEFAULT_PARAMS, log_model, save_artifact
+from src.training.fingerprint import config_fingerprint
+from src.training.scheduler import train_candidates, TRACKING_URI, ARTIFACT_DIR
+from src.training.search import search, SEARCH_SPACE
+from src.training.dataset_snapshot import SnapshotManager
+from src.monitoring.spans import span, traced
+from src.storage import backend
+from src.training.incremental import (
+    MODEL_NAME, MIN_NEW_ROWS, registered_model_info, full_rebuild_reason, incremental_update
 )
 
-def evaluate(y_true, y_pred):
-    rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-    mae = mean_absolute_error(y_true, y_pred)
-    r2 = r2_score(y_true, y_pred)
-    return {"rmse": rmse, "mae": mae, "r2": r2}
+mlflow.set_tracking_uri(TRACKING_URI)
+
+SEARCH = os.getenv("TRAINING_SEARCH", "1") == "1"
+SNAPSHOT = os.getenv("TRAINING_SNAPSHOT")   # set to retrain on a past snapshot
+FORCE = os.getenv("TRAINING_FORCE", "0") == "1"   # always run a full retrain
+
+# Everything besides the data that decides what gets trained
+CONFIG_FINGERPRINT = config_fingerprint({
+    "candidates": sorted(TRAINERS),
+    "default_params": DEFAULT_PARAMS,
+    "search": SEARCH,
+    "search_space": SEARCH_SPACE,
+})
+
+
+def save_best_model(name, artifact):
+    os.makedirs("app", exist_ok=True)
+    target = "app/best_model" + os.path.splitext(artifact)[1]
+    shutil.copyfile(artifact, target)
+    print(f"Saved {name} as {target}. ✅ You can now download it from GitHub.")
+
+    # Compiled flat-array forest, much smaller and faster to load
+    compiled = os.path.splitext(artifact)[0] + ".npz"
+    if os.path.exists(compiled):
+        shutil.copyfile(compiled, "app/best_model.npz")
+        print("Saved compiled forest as app/best_model.npz")
+
+
+def register_best_model(run_id):
+    with span("register"):
+        version = mlflow.register_model(f"runs:/{run_id}/model", MODEL_NAME)
+    print(f"Registered {MODEL_NAME} version {version.version}")
+    return version
+
+
+def run_incremental_update(df, info, snapshot_version):
+    """
+    Warm-start the registered model on snapshot rows newer than it has
+    seen. Returns True when done, False when a full retrain is needed.
+    """
+    trained_until = pd.Timestamp(info["tags"]["trained_until"])
+    new = df[df["timestamp"] > trained_until].dropna()
+    if len(new) < MIN_NEW_ROWS:
+        print(f"Only {len(new)} new rows since {trained_until}, keeping version {info['version']}.")
+        return True
+
+    X_new = new.drop(columns=["aqi", "timestamp", "city"])
+    y_new = new["aqi"]
+    latest = pd.Timestamp(new["timestamp"].max()).tz_localize(None).isoformat()
+    with span("fit", mode="incremental", rows=len(new)):
+        model, metrics, tags = incremental_update(info, X_new, y_new, latest)
+    if model is None:
+        print(f"Full retrain needed: {tags}")
+        return False
+    tags["snapshot_version"] = snapshot_version
+    tags["config_fingerprint"] = CONFIG_FINGERPRINT
+
+    name = tags["candidate"]
+    with mlflow.start_run(run_name=f"{name}-incremental") as run:
+        # Scored before the update, on rows the model had not seen
+        mlflow.log_metrics(metrics)
+        mlflow.log_param("new_rows", len(new))
+        mlflow.set_tags(tags)
+        log_model(model)
+        artifact = save_artifact(name, model, ARTIFACT_DIR)
+
+    print(f"{name} updated on {len(new)} new rows (pre-update RMSE {metrics['rmse']:.4f})")
+    save_best_model(name, artifact)
+    register_best_model(run.info.run_id)
+    return True
+
 
+@traced("training_pipeline")
 def run_training_pipeline():
     # 1️⃣ Connect to Hopsworks
-    project = hopsworks.login(
-    api_key_value=os.environ["HOPSWORKS_API_KEY"],
-    host="https://run.hopsworks.ai")
-    fs = project.get_feature_store()
+    with span("login"):
+        project = backend.login(
+            api_key_value=os.environ.get("HOPSWORKS_API_KEY"),
+            host="https://run.hopsworks.ai")
+        fs = project.get_feature_store()
+
+    fg = fs.get_feature_group(FEATURE_GROUP_NAME, version=FEATURE_GROUP_VERSION)
+
+    # Local snapshot of the training set; only rows newer than it are pulled
+    snapshots = SnapshotManager()
+    if SNAPSHOT:
+        df, snapshot_version = snapshots.load(SNAPSHOT), SNAPSHOT
+        print(f"Reproducing training snapshot {SNAPSHOT}")
+    else:
+        with span("fg_read", query="training_snapshot") as s:
+            df, snapshot_version = snapshots.update(fg)
+            s.set(rows=len(df), snapshot=snapshot_version)
+    df = df.copy()
+    df["timestamp"] = pd.to_datetime(df["timestamp"]).dt.tz_localize(None)
+
+    # Nothing to do if the registered model saw this exact data and config
+    info = None if SNAPSHOT else registered_model_info(MODEL_NAME)
+    if info and not FORCE \
+            and info["tags"].get("snapshot_version") == snapshot_version \
+            and info["tags"].get("config_fingerprint") == CONFIG_FINGERPRINT:
+        print(f"Data and config unchanged since version {info['version']}, skipping training.")
+        return
+
+    # Warm-start on new rows only, unless a full rebuild is due
+    if SNAPSHOT:
+        reason = "reproducing a snapshot"
+    elif FORCE:
+        reason = "TRAINING_FORCE=1"
+    else:
+        reason = full_rebuild_reason(info)
+    if reason is None and run_incremental_update(df, info, snapshot_version):
+        return
+    if reason:
+        print(f"Full retrain: {reason}")
 
-    fg = fs.get_feature_group("karachi_aqi_features", version=1)
-    df = fg.read()
+    df = df.dropna()  # first rows have no lag history
 
     # 2️⃣ Split features & target
     X = df.drop(columns=["aqi", "timestamp", "city"])
@@ -41,67 +143,41 @@ def run_training_pipeline():
     X_train, X_test = X.iloc[:split], X.iloc[split:]
     y_train, y_test = y.iloc[:split], y.iloc[split:]
 
-    # 3️⃣ Train models
-    all_metrics = {}
-
-    # ----- Random Forest -----
-    with mlflow.start_run(run_name="RandomForest"):
-        rf = RandomForestRegressor(n_estimators=100, random_state=42)
-        rf.fit(X_train, y_train)
-        preds = rf.predict(X_test)
-        metrics = evaluate(y_test, preds)
-        mlflow.log_metrics(metrics)
-        mlflow.sklearn.log_model(rf, "model")
-        all_metrics["RandomForest"] = (rf, metrics)
-
-    # ----- Ridge Regression -----
-    with mlflow.start_run(run_name="Ridge"):
-        ridge = Ridge(alpha=1.0)
-        ridge.fit(X_train, y_train)
-        preds = ridge.predict(X_test)
-        metrics = evaluate(y_test, preds)
-        mlflow.log_metrics(metrics)
-        mlflow.sklearn.log_model(ridge, "model")
-        all_metrics["Ridge"] = (ridge, metrics)
-
-    # ----- Neural Net -----
-    with mlflow.start_run(run_name="NeuralNet"):
-        nn = Sequential([
-            Dense(64, activation="relu", input_shape=(X_train.shape[1],)),
-            Dense(32, activation="relu"),
-            Dense(1)
-        ])
-        nn.compile(optimizer="adam", loss="mse")
-        nn.fit(X_train, y_train, epochs=20, verbose=0)
-        preds = nn.predict(X_test).flatten()
-        metrics = evaluate(y_test, preds)
-        mlflow.log_metrics(metrics)
-        mlflow.tensorflow.log_model(nn, "model")
-        all_metrics["NeuralNet"] = (nn, metrics)
+    # 3️⃣ Tune hyperparameters with time-series CV on the training rows
+    best_params = {}
+    if SEARCH:
+        with span("search", rows=len(X_train)):
+            best_params = {name: p for name, (p, _) in search(X_train, y_train).items()}
+
+    # Train candidates concurrently, one MLflow run each
+    trained_until = pd.Timestamp(df["timestamp"].max()).tz_localize(None).isoformat()
+    tags = {
+        "training_mode": "full",
+        "trained_until": trained_until,
+        "last_full_rebuild": datetime.utcnow().isoformat(),
+        "snapshot_version": snapshot_version,
+        "config_fingerprint": CONFIG_FINGERPRINT,
+    }
+    results = train_candidates(X_train, y_train, X_test, y_test, params=best_params, tags=tags)
+    all_metrics = {name: r["metrics"] for name, r in results.items()}
 
     # 4️⃣ Select best model (lowest RMSE)
-    best_model_name = min(all_metrics, key=lambda k: all_metrics[k][1]["rmse"])
-    best_model_obj = all_metrics[best_model_name][0]
-    print(f"Best model: {best_model_name} with RMSE: {all_metrics[best_model_name][1]['rmse']}")
+    best_model_name = min(all_metrics, key=lambda k: all_metrics[k]["rmse"])
+    best_artifact = results[best_model_name]["artifact"]
+    print(f"Best model: {best_model_name} with RMSE: {all_metrics[best_model_name]['rmse']}")
 
     # 5️⃣ Save best model in app/ folder for manual download
-    os.makedirs("app", exist_ok=True)
-    if best_model_name in ["RandomForest", "Ridge"]:
-        # Save scikit-learn model as .pkl
-        joblib.dump(best_model_obj, "app/best_model.pkl")
-        print(f"Saved {best_model_name} as app/best_model.pkl. ✅ You can now download it from GitHub.")
-    else:
-        # NeuralNet (TensorFlow) save as .h5
-        best_model_obj.save("app/best_model.h5")
-        print("Saved NeuralNet model as app/best_model.h5. ✅ You can now download it from GitHub.")
+    save_best_model(best_model_name, best_artifact)
 
-    # 6️⃣ Register best model in MLflow (optional)
+    # 6️⃣ Register best model in MLflow; its test RMSE is the drift baseline
     client = MlflowClient()
-    MODEL_NAME = "AQI_Predictor_Best"
     try:
         client.create_registered_model(MODEL_NAME)
     except:
         pass
+    best_run_id = results[best_model_name]["run_id"]
+    client.set_tag(best_run_id, "baseline_rmse", str(all_metrics[best_model_name]["rmse"]))
+    register_best_model(best_run_id)
     print(f"Best model registered in MLflow: {best_model_name}")
 
 if __name__ == "__main__":
@@ -0,0 +1,28 @@
+import os
+
+# --------------------------------------------------
+# Feature store
+# --------------------------------------------------
+# Version 2 adds the lag / rolling / EWMA pollutant features
+# produced by src/features/feature_engine.py
+FEATURE_GROUP_NAME = "karachi_aqi_features"
+FEATURE_GROUP_VERSION = 2
+
+# --------------------------------------------------
+# Locations
+# --------------------------------------------------
+# Points ingested every run; each name is the `city` key in the feature
+# group. The forecast and dashboard headline use PRIMARY_CITY.
+PRIMARY_CITY = "Karachi"
+LOCATIONS_PATH = os.getenv(
+    "AQI_LOCATIONS", os.path.join(os.path.dirname(__file__), "locations.json")
+)
+
+# --------------------------------------------------
+# Storage backend
+# --------------------------------------------------
+# "hopsworks": Hopsworks feature store + DagsHub MLflow (production)
+# "local": embedded feature store + directory MLflow registry under LOCAL_STORE_DIR
+BACKEND = os.getenv("AQI_BACKEND", "hopsworks")
+LOCAL_STORE_DIR = os.getenv("AQI_LOCAL_STORE", "data/local")
+MLFLOW_TRACKING_URI = "https://dagshub.com/AfifaSiddiquee/AQIPredictorProject.mlflow/"
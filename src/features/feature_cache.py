@@ -0,0 +1,219 @@
+import os
+import json
+import pandas as pd
+from datetime import timedelta
+from functools import reduce
+from operator import and_
+
+from src.config.config import FEATURE_GROUP_NAME, FEATURE_GROUP_VERSION
+
+CACHE_DIR = f"data/cache/{FEATURE_GROUP_NAME}_v{FEATURE_GROUP_VERSION}"
+
+
+# --------------------------------------------------
+# Time-windowed reads (pushed down to the feature store)
+# --------------------------------------------------
+def read_since(fg, since=None):
+    """
+    Read only rows with timestamp > since from a Hopsworks feature group.
+    Falls back to a full read when no watermark is given.
+    """
+    if since is None:
+        return fg.read()
+    return fg.filter(fg.timestamp > since).read()
+
+
+def naive_utc(timestamps):
+    """
+    Timestamps as naive UTC, the form the cache and its marks use
+    (feature-store reads may come back tz-aware).
+    """
+    timestamps = pd.to_datetime(timestamps)
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_convert("UTC").dt.tz_localize(None)
+    return timestamps
+
+
+def _naive_mark(ts):
+    ts = pd.Timestamp(ts)
+    return ts.tz_convert("UTC").tz_localize(None) if ts.tzinfo is not None else ts
+
+
+def read_since_per_city(fg, marks):
+    """
+    Rows newer than each city's own watermark ({city: timestamp}), so a
+    city whose rows land late is not hidden behind another city's newer
+    ones. Known cities are read in one query from the oldest mark and
+    trimmed per city; cities without a mark are read in full.
+    """
+    if not marks:
+        return fg.read()
+    marks = {city: _naive_mark(ts) for city, ts in marks.items()}
+
+    known = fg.filter(fg.timestamp > min(marks.values())).read()
+    if not known.empty:
+        known["timestamp"] = naive_utc(known["timestamp"])
+        cutoff = known["city"].astype(str).map(marks)
+        known = known[cutoff.notna() & (known["timestamp"] > cutoff)]
+
+    unseen = fg.filter(reduce(and_, [fg.city != city for city in marks])).read()
+    frames = [f for f in (known, unseen) if not f.empty]
+    if not frames:
+        return known
+    return pd.concat(frames, ignore_index=True)
+
+
+def city_marks(df, marks=None):
+    """
+    {city: latest timestamp} of df merged into marks.
+    """
+    marks = {city: _naive_mark(ts) for city, ts in (marks or {}).items()}
+    if df.empty:
+        return marks
+    latest = naive_utc(df["timestamp"]).groupby(df["city"].astype(str)).max()
+    for city, ts in latest.items():
+        if city not in marks or ts > marks[city]:
+            marks[city] = ts
+    return marks
+
+
+# --------------------------------------------------
+# Local day-partitioned cache with per-city high-water marks
+# --------------------------------------------------
+class FeatureCache:
+    """
+    On-disk copy of a feature group, one CSV per UTC day plus a
+    manifest holding the high-water marks (latest cached timestamp per
+    city).
+
+    refresh() pulls only rows newer than each city's mark; last_n() and
+    last_hours() read the newest partitions only, so their cost does
+    not grow with the length of the history.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+
+    # ---------- manifest ----------
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def high_water_marks(self):
+        """
+        {city: latest cached timestamp}. Caches written before the marks
+        were per city get them from their partitions once.
+        """
+        manifest = self._read_manifest()
+        if "high_water_marks" in manifest:
+            return {city: pd.Timestamp(ts) for city, ts in manifest["high_water_marks"].items()}
+        days = self._partition_days()
+        if not manifest.get("high_water_mark") or not days:
+            return {}
+        marks = city_marks(pd.concat([self._read_partition(d) for d in days], ignore_index=True))
+        self._set_high_water_marks(marks)
+        return marks
+
+    def high_water_mark(self):
+        marks = self.high_water_marks()
+        return max(marks.values()) if marks else None
+
+    def _set_high_water_marks(self, marks):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({
+                "high_water_mark": max(marks.values()).isoformat(),
+                "high_water_marks": {city: ts.isoformat() for city, ts in marks.items()},
+            }, f)
+        os.replace(tmp, self.manifest_path)
+
+    # ---------- partitions ----------
+    def _partition_path(self, day):
+        return os.path.join(self.cache_dir, f"day={day}.csv")
+
+    def _partition_days(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        days = [
+            name[len("day="):-len(".csv")]
+            for name in os.listdir(self.cache_dir)
+            if name.startswith("day=") and name.endswith(".csv")
+        ]
+        return sorted(days)
+
+    def _read_partition(self, day):
+        return pd.read_csv(self._partition_path(day), parse_dates=["timestamp"])
+
+    def write(self, df):
+        """
+        Merge rows into their day partitions (dedup on city + timestamp)
+        and advance the high-water marks.
+        """
+        if df.empty:
+            return
+        df = df.copy()
+        df["timestamp"] = naive_utc(df["timestamp"])
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        for day, part in df.groupby(df["timestamp"].dt.strftime("%Y-%m-%d")):
+            path = self._partition_path(day)
+            if os.path.exists(path):
+                part = pd.concat([self._read_partition(day), part], ignore_index=True)
+            part = (
+                part.drop_duplicates(subset=["city", "timestamp"], keep="last")
+                .sort_values("timestamp")
+            )
+            part.to_csv(path, index=False)
+
+        self._set_high_water_marks(city_marks(df, self.high_water_marks()))
+
+    def refresh(self, fg):
+        """
+        Pull rows newer than each city's high-water mark into the cache.
+        Returns the number of new rows.
+        """
+        new_rows = read_since_per_city(fg, self.high_water_marks())
+        self.write(new_rows)
+        return len(new_rows)
+
+    # ---------- queries ----------
+    def last_n(self, n, city=None):
+        """
+        Latest n rows, newest first, optionally for one city only.
+        """
+        frames, count = [], 0
+        for day in reversed(self._partition_days()):
+            part = self._read_partition(day)
+            if city is not None:
+                part = part[part["city"] == city]
+            frames.append(part)
+            count += len(part)
+            if count >= n:
+                break
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        return df.sort_values("timestamp", ascending=False).head(n).reset_index(drop=True)
+
+    def last_hours(self, hours, city=None):
+        """
+        Rows within `hours` of the high-water mark, newest first.
+        """
+        hwm = self.high_water_mark()
+        if hwm is None:
+            return pd.DataFrame()
+        cutoff = hwm - timedelta(hours=hours)
+        first_day = cutoff.strftime("%Y-%m-%d")
+
+        days = [d for d in self._partition_days() if d >= first_day]
+        if not days:
+            return pd.DataFrame()
+        df = pd.concat([self._read_partition(d) for d in days], ignore_index=True)
+        df = df[df["timestamp"] > cutoff]
+        if city is not None:
+            df = df[df["city"] == city]
+        return df.sort_values("timestamp", ascending=False).reset_index(drop=True)
@@ -0,0 +1,262 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from src.config.config import FEATURE_GROUP_NAME, FEATURE_GROUP_VERSION
+
+POLLUTANTS = ["pm25", "pm10", "co", "no2", "so2", "o3"]
+TIME_FEATURES = ["hour", "day", "month", "weekday"]
+
+LAGS = (1, 3, 6, 24)        # hours
+WINDOWS = (3, 24)           # rolling mean windows, hours
+SPANS = (6, 24)             # EWMA spans, hours
+
+STATE_PATH = f"data/state/{FEATURE_GROUP_NAME}_v{FEATURE_GROUP_VERSION}_feature_state.json"
+
+
+# --------------------------------------------------
+# Time features
+# --------------------------------------------------
+def add_time_features(df):
+    df["hour"] = df["timestamp"].dt.hour
+    df["day"] = df["timestamp"].dt.day
+    df["month"] = df["timestamp"].dt.month
+    df["weekday"] = df["timestamp"].dt.weekday
+    return df
+
+
+# --------------------------------------------------
+# Array core (shared by every caller)
+# --------------------------------------------------
+def derive(values, n_context=0, ewm_seed=None, lags=LAGS, windows=WINDOWS, spans=SPANS,
+           rows=None):
+    """
+    Lag, rolling-mean and EWMA features along the time axis.
+
+    values:   array (..., T, P) whose first n_context rows are already
+              processed history (used as lag / window context only).
+    ewm_seed: {span: array (..., P)} EWMA values at the last context row.
+    rows:     optional indices into the new rows; only those rows are
+              returned (the EWMAs still run over every row).
+
+    Returns ({feature: array (..., T - n_context, P)}, {span: last EWMA}).
+    Matches pandas shift(k), rolling(w, min_periods=1).mean() and
+    ewm(span=s, adjust=False).mean() on the concatenated series.
+    """
+    values = np.asarray(values, dtype=float)
+    T = values.shape[-2]
+    idx = np.arange(n_context, T) if rows is None else n_context + np.asarray(rows)
+    out = {}
+
+    for k in lags:
+        lagged = values[..., np.maximum(idx - k, 0), :]
+        lagged[..., idx < k, :] = np.nan
+        out[f"lag_{k}"] = lagged
+
+    valid = ~np.isnan(values)
+    zero_pad = np.zeros(values.shape[:-2] + (1, values.shape[-1]))
+    csum = np.concatenate([zero_pad, np.cumsum(np.where(valid, values, 0.0), axis=-2)], axis=-2)
+    ccnt = np.concatenate([zero_pad, np.cumsum(valid, axis=-2)], axis=-2)
+    for w in windows:
+        lo = np.maximum(idx + 1 - w, 0)
+        total = csum[..., idx + 1, :] - csum[..., lo, :]
+        count = ccnt[..., idx + 1, :] - ccnt[..., lo, :]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+        out[f"roll_{w}h"] = mean
+
+    new_values = values[..., n_context:, :]
+    last_ewm = {}
+    for s in spans:
+        seed = None
+        if ewm_seed is not None and ewm_seed.get(s) is not None:
+            seed = np.asarray(ewm_seed[s], dtype=float)
+        series = _ewm(new_values, s, seed)
+        out[f"ewm_{s}h"] = series if rows is None else series[..., idx - n_context, :]
+        last_ewm[s] = series[..., -1, :] if series.shape[-2] else seed
+
+    return out, last_ewm
+
+
+def _ewm(values, span, seed=None):
+    """
+    ewm(span, adjust=False) along the time axis, continuing from seed.
+    2-D input goes through pandas' compiled ewm; batched input
+    (scenarios, T, P) uses the recursion vectorized over the batch.
+    """
+    if values.ndim == 2:
+        frame = pd.DataFrame(values)
+        if seed is not None:
+            frame = pd.concat([pd.DataFrame(seed[None, :]), frame], ignore_index=True)
+        series = frame.ewm(span=span, adjust=False).mean().to_numpy()
+        return series[1:] if seed is not None else series
+
+    alpha = 2.0 / (span + 1.0)
+    prev = np.full(values.shape[:-2] + (values.shape[-1],), np.nan)
+    if seed is not None:
+        prev = np.broadcast_to(seed, prev.shape).copy()
+    series = np.empty_like(values)
+    for t in range(values.shape[-2]):
+        x = values[..., t, :]
+        prev = np.where(
+            np.isnan(prev), x,
+            np.where(np.isnan(x), prev, (1 - alpha) * prev + alpha * x)
+        )
+        series[..., t, :] = prev
+    return series
+
+
+# --------------------------------------------------
+# Feature engine
+# --------------------------------------------------
+class FeatureEngine:
+    """
+    Single definition of the model features: calendar fields plus
+    per-pollutant lags, rolling means and EWMAs.
+
+    transform() is vectorized over a whole history (backfill) and can
+    continue from a saved state; update() processes one new hourly row
+    using only the state, so the live pipeline never re-reads history.
+    """
+
+    def __init__(self, lags=LAGS, windows=WINDOWS, spans=SPANS):
+        self.lags = tuple(lags)
+        self.windows = tuple(windows)
+        self.spans = tuple(spans)
+        self.context_size = max(self.lags + self.windows)
+
+    @property
+    def derived_features(self):
+        names = []
+        for kind in [f"lag_{k}" for k in self.lags] \
+                + [f"roll_{w}h" for w in self.windows] \
+                + [f"ewm_{s}h" for s in self.spans]:
+            names += [f"{p}_{kind}" for p in POLLUTANTS]
+        return names
+
+    @property
+    def feature_names(self):
+        return POLLUTANTS + TIME_FEATURES + self.derived_features
+
+    def transform(self, df, state=None):
+        """
+        Add time and windowed features to df (any number of cities).
+        Rows at or before a city's last processed timestamp in `state`
+        are dropped. Returns (features_df, new_state).
+
+        Lags and windows are in hours: each city is laid out on a full
+        hourly grid, and hours with no reading stay NaN instead of
+        shifting the later rows.
+        """
+        state = dict(state or {})
+        df = df.copy()
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        frames = []
+
+        for city, group in df.groupby("city", sort=False, observed=True):
+            group = group.sort_values("timestamp")
+            city_state = state.get(city)
+
+            if city_state is not None:
+                last_ts = pd.Timestamp(city_state["last_timestamp"])
+                group = group[group["timestamp"] > last_ts]
+                context = np.asarray(city_state["buffer"], dtype=float).reshape(-1, len(POLLUTANTS))
+                seed = {int(s): np.asarray(v, dtype=float) for s, v in city_state["ewm"].items()}
+            else:
+                context = np.empty((0, len(POLLUTANTS)))
+                seed = None
+            group = group.drop_duplicates(subset="timestamp", keep="last")
+            if group.empty:
+                continue
+
+            # Missing pollutant values carry the last reading forward
+            filled = pd.DataFrame(
+                np.vstack([context, group[POLLUTANTS].to_numpy(dtype=float)]),
+                columns=POLLUTANTS
+            ).ffill().to_numpy()
+            observed = filled[len(context):]
+
+            # Hourly grid from the hour after the state (or the first row)
+            hours = group["timestamp"].dt.floor("h")
+            start = last_ts.floor("h") + pd.Timedelta(hours=1) if city_state is not None \
+                else hours.iloc[0]
+            offsets = ((hours - start) // pd.Timedelta(hours=1)).to_numpy()
+            # One row per hour, none inside the hour the state already covers
+            keep = np.r_[offsets[1:] != offsets[:-1], True] & (offsets >= 0)
+            if not keep.any():
+                continue
+            group, observed, offsets = group[keep], observed[keep], offsets[keep]
+
+            grid = np.full((offsets[-1] + 1, len(POLLUTANTS)), np.nan)
+            grid[offsets] = observed
+            raw = np.vstack([context, grid])
+
+            derived, last_ewm = derive(
+                raw, n_context=len(context), ewm_seed=seed,
+                lags=self.lags, windows=self.windows, spans=self.spans
+            )
+
+            group = add_time_features(group.copy())
+            columns = {}
+            for kind, arr in derived.items():
+                for j, p in enumerate(POLLUTANTS):
+                    columns[f"{p}_{kind}"] = arr[offsets, j]
+            group = pd.concat(
+                [group.reset_index(drop=True), pd.DataFrame(columns)[self.derived_features]],
+                axis=1
+            )
+            frames.append(group)
+
+            state[city] = {
+                "last_timestamp": group["timestamp"].iloc[-1].isoformat(),
+                "buffer": raw[-self.context_size:].tolist(),
+                "ewm": {str(s): v.tolist() for s, v in last_ewm.items()},
+            }
+
+        if not frames:
+            return df.iloc[0:0], state
+        return pd.concat(frames, ignore_index=True), state
+
+    def fit_state(self, history):
+        """
+        Build window state from recent history without keeping features.
+        """
+        return self.transform(history)[1]
+
+    def update(self, row, state):
+        """
+        Features for one new reading; cost depends only on the window sizes.
+        """
+        features, state = self.transform(pd.DataFrame([row]), state)
+        return features, state
+
+
+# --------------------------------------------------
+# Persisted window state
+# --------------------------------------------------
+def load_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_PATH):
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+
+    def clean(obj):
+        if isinstance(obj, float) and np.isnan(obj):
+            return None
+        if isinstance(obj, list):
+            return [clean(x) for x in obj]
+        if isinstance(obj, dict):
+            return {k: clean(v) for k, v in obj.items()}
+        return obj
+
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(clean(state), f)
+    os.replace(tmp, path)
@@ -1,35 +1,73 @@
 import pandas as pd
-import os
 
-def process_historical_features(input_csv="data/raw/historical_aqi.csv",
-                                output_csv="data/processed/historical_features.csv"):
+from src.features.feature_engine import FeatureEngine, POLLUTANTS, load_state, save_state
+from src.storage.columnar_store import load_table, save_table, apply_dtypes, table_cities
+from src.monitoring.spans import span, traced
+
+CHECKPOINT_PATH = "data/state/historical_features_checkpoint.json"
+
+@traced("historical_features")
+def process_historical_features(input_path="data/raw/historical_aqi",
+                                output_path="data/processed/historical_features",
+                                incremental=False, checkpoint_path=CHECKPOINT_PATH):
     """
     Process raw historical AQI data into features for model training.
+    Paths are partitioned Parquet datasets; a path ending in .csv
+    (or a missing dataset with a sibling .csv) is read / written as CSV.
+
+    With incremental=True only raw rows newer than the checkpoint are
+    processed (all rows for cities the checkpoint does not have yet). The checkpoint holds the feature engine's per-city window
+    state, so lags and windows continue without re-reading history, and
+    the new rows are upserted (or appended, for CSV) into the output.
     """
 
-    df = pd.read_csv(input_csv, parse_dates=["timestamp"])
-    
-    # 1. Extract time-based features
-    df["hour"] = df["timestamp"].dt.hour
-    df["day"] = df["timestamp"].dt.day
-    df["month"] = df["timestamp"].dt.month
-    df["weekday"] = df["timestamp"].dt.weekday
+    engine = FeatureEngine()
+    state = load_state(checkpoint_path) if incremental else None
+    if incremental and not state:
+        print("No checkpoint found, running a full rebuild.")
+        incremental = False
+
+    with span("read", path=input_path) as s:
+        if incremental:
+            # Month partitions older than the oldest checkpoint are pruned
+            since = min(city_state["last_timestamp"] for city_state in state.values())
+            df = load_table(input_path, start=since)
+            # Cities without a checkpoint (e.g. new locations) start from their first row
+            unseen = [city for city in table_cities(input_path) if city not in state]
+            if unseen:
+                df = pd.concat([
+                    df[df["city"].astype(str).isin(list(state))],
+                    load_table(input_path, cities=unseen),
+                ], ignore_index=True)
+            s.rows(df)
+        else:
+            df = s.rows(load_table(input_path))
+
+    # 1. Time-based and windowed pollutant features
+    with span("transform") as s:
+        df, new_state = engine.transform(df, state)
+        s.rows(df)
+    if df.empty:
+        print("No new raw rows to process.")
+        return df.reindex(columns=engine.feature_names), pd.Series(name="aqi", dtype=float)
 
     # 2. Handle missing pollutant values
-    pollutant_cols = ["pm25", "pm10", "co", "no2", "so2", "o3"]
+    pollutant_cols = POLLUTANTS
     df[pollutant_cols] = df[pollutant_cols].fillna(-1)
 
     # 3. Select final features
-    feature_columns = pollutant_cols + ["hour", "day", "month", "weekday"]
+    feature_columns = engine.feature_names
     X = df[feature_columns]
     y = df["aqi"]
 
     # 4. Save processed features
-    os.makedirs(os.path.dirname(output_csv), exist_ok=True)
-    df.to_csv(output_csv, index=False)
-    print(f"Processed historical features saved to {output_csv}")
+    with span("write", path=output_path, rows=len(df)):
+        df = apply_dtypes(df)
+        save_table(df, output_path, append=incremental)
+    save_state(new_state, checkpoint_path)
+    print(f"Processed {len(df)} rows, features saved to {output_path}")
 
     return X, y
 
 if __name__ == "__main__":
-    process_historical_features()
+    process_historical_features(incremental=True)
@@ -0,0 +1,166 @@
+import os
+import json
+from collections import defaultdict, deque
+
+import numpy as np
+import pandas as pd
+
+from src.config.config import FEATURE_GROUP_NAME, FEATURE_GROUP_VERSION
+from src.features.feature_engine import POLLUTANTS
+
+WINDOW = pd.Timedelta(hours=1)              # tumbling window = feature row granularity
+ALLOWED_LATENESS = pd.Timedelta(minutes=5)  # how long a window stays open past its end
+SLIDING_WIDTH = pd.Timedelta(minutes=15)
+VALUES = ["aqi"] + POLLUTANTS
+
+WINDOW_STATE_PATH = f"data/state/{FEATURE_GROUP_NAME}_v{FEATURE_GROUP_VERSION}_stream_windows.json"
+
+
+# --------------------------------------------------
+# Tumbling windows: sub-hour readings -> one hourly row per city
+# --------------------------------------------------
+class TumblingWindows:
+    """
+    Running sums and counts per (city, window start). A window closes
+    once the city's newest reading is ALLOWED_LATENESS past the window
+    end; its row is the mean of every reading it received, stamped
+    with the window start like the hourly API readings. Readings for a
+    window that has already closed (or is due to) are counted in `late` and dropped.
+    """
+
+    def __init__(self, window=WINDOW, allowed_lateness=ALLOWED_LATENESS):
+        self.window = window
+        self.allowed_lateness = allowed_lateness
+        self._sums = {}                 # (city, start) -> np.array of sums
+        self._counts = {}               # (city, start) -> np.array of counts
+        self._event_time = {}           # city -> newest reading timestamp
+        self._closed_until = {}         # city -> end of the last emitted window
+        self.late = 0
+
+    def add(self, reading):
+        city = reading["city"]
+        ts = pd.Timestamp(reading["timestamp"])
+        start = ts.floor(self.window)
+        newest = self._event_time.get(city)
+        if (city in self._closed_until and start < self._closed_until[city]) or \
+                (newest is not None and newest >= start + self.window + self.allowed_lateness):
+            self.late += 1
+            return
+
+        values = np.array([reading.get(v) for v in VALUES], dtype=float)
+        seen = ~np.isnan(values)
+        key = (city, start)
+        if key not in self._sums:
+            self._sums[key] = np.zeros(len(VALUES))
+            self._counts[key] = np.zeros(len(VALUES))
+        self._sums[key][seen] += values[seen]
+        self._counts[key] += seen
+        self._event_time[city] = max(ts, self._event_time.get(city, ts))
+
+    def _emit(self, keys):
+        rows = []
+        for city, start in sorted(keys, key=lambda k: k[1]):
+            counts = self._counts.pop((city, start))
+            sums = self._sums.pop((city, start))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means = np.where(counts > 0, sums / counts, np.nan)
+            row = {"city": city, "timestamp": start.to_pydatetime()}
+            row.update(zip(VALUES, means.tolist()))
+            row["aqi"] = int(round(row["aqi"])) if not np.isnan(row["aqi"]) else None
+            rows.append(row)
+            end = start + self.window
+            self._closed_until[city] = max(end, self._closed_until.get(city, end))
+        return rows
+
+    def closed(self):
+        """
+        Rows for every window whose lateness allowance has passed.
+        """
+        keys = [
+            (city, start) for city, start in self._sums
+            if self._event_time[city] >= start + self.window + self.allowed_lateness
+        ]
+        return self._emit(keys)
+
+    def flush_all(self):
+        """
+        Rows for every open window (used at shutdown).
+        """
+        return self._emit(list(self._sums))
+
+    # ---------- checkpoint ----------
+    def save(self, path=WINDOW_STATE_PATH):
+        """
+        Persist open windows so consumer offsets can be committed for
+        readings that have not been emitted yet.
+        """
+        state = {
+            "open": [
+                [city, start.isoformat(), self._sums[(city, start)].tolist(),
+                 self._counts[(city, start)].tolist()]
+                for city, start in self._sums
+            ],
+            "event_time": {c: ts.isoformat() for c, ts in self._event_time.items()},
+            "closed_until": {c: ts.isoformat() for c, ts in self._closed_until.items()},
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+    def load(self, path=WINDOW_STATE_PATH):
+        if not os.path.exists(path):
+            return self
+        with open(path) as f:
+            state = json.load(f)
+        for city, start, sums, counts in state["open"]:
+            key = (city, pd.Timestamp(start))
+            self._sums[key] = np.asarray(sums, dtype=float)
+            self._counts[key] = np.asarray(counts, dtype=float)
+        self._event_time = {c: pd.Timestamp(ts) for c, ts in state["event_time"].items()}
+        self._closed_until = {c: pd.Timestamp(ts) for c, ts in state["closed_until"].items()}
+        return self
+
+
+# --------------------------------------------------
+# Sliding window: live per-city means over the last few minutes
+# --------------------------------------------------
+class SlidingWindow:
+    """
+    Mean of each city's readings in the trailing `width` of event time,
+    updated per reading. Gives a sub-hour live view between the hourly
+    feature rows.
+    """
+
+    def __init__(self, width=SLIDING_WIDTH):
+        self.width = width
+        self._readings = defaultdict(deque)     # city -> deque of (ts, values)
+        self._newest = {}                       # city -> newest reading timestamp
+
+    def add(self, reading):
+        city = reading["city"]
+        ts = pd.Timestamp(reading["timestamp"])
+        values = np.array([reading.get(v) for v in VALUES], dtype=float)
+        readings = self._readings[city]
+        readings.append((ts, values))
+        newest = self._newest[city] = max(ts, self._newest.get(city, ts))
+        while readings and readings[0][0] <= newest - self.width:
+            readings.popleft()
+
+    def current(self):
+        """
+        One row per city: newest timestamp, reading count and means.
+        """
+        rows = []
+        for city, readings in self._readings.items():
+            if not readings:
+                continue
+            values = np.vstack([v for _, v in readings])
+            counts = (~np.isnan(values)).sum(axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means = np.where(counts > 0, np.nansum(values, axis=0) / counts, np.nan)
+            row = {"city": city, "timestamp": self._newest[city], "readings": len(readings)}
+            row.update(zip(VALUES, means.tolist()))
+            rows.append(row)
+        return pd.DataFrame(rows)
@@ -0,0 +1,60 @@
+import os
+import json
+import pandas as pd
+from datetime import datetime, timedelta
+
+from src.config.config import FEATURE_GROUP_NAME, FEATURE_GROUP_VERSION
+
+WATERMARK_PATH = f"data/state/{FEATURE_GROUP_NAME}_v{FEATURE_GROUP_VERSION}_watermarks.json"
+
+
+# --------------------------------------------------
+# Persisted per-city ingestion watermarks
+# --------------------------------------------------
+def load_watermarks(path=WATERMARK_PATH):
+    """
+    Return {city: latest ingested timestamp} from the local state file.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        raw = json.load(f)
+    return {city: pd.Timestamp(ts).to_pydatetime() for city, ts in raw.items()}
+
+
+def save_watermarks(watermarks, path=WATERMARK_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({city: pd.Timestamp(ts).isoformat() for city, ts in watermarks.items()}, f)
+    os.replace(tmp, path)
+
+
+def advance_watermarks(df, path=WATERMARK_PATH):
+    """
+    Move each city's watermark forward to the newest timestamp in df.
+    Never moves a watermark backwards.
+    """
+    if df.empty:
+        return load_watermarks(path)
+    watermarks = load_watermarks(path)
+    latest = pd.to_datetime(df["timestamp"]).dt.tz_localize(None).groupby(df["city"]).max()
+    for city, ts in latest.items():
+        ts = ts.to_pydatetime()
+        if city not in watermarks or ts > watermarks[city]:
+            watermarks[city] = ts
+    save_watermarks(watermarks, path)
+    return watermarks
+
+
+def probe_watermarks(fg, lookback_days):
+    """
+    Recover watermarks from the feature store when no local state exists.
+    Only the key columns of the last `lookback_days` are read.
+    """
+    since = datetime.utcnow() - timedelta(days=lookback_days)
+    keys = fg.select(["city", "timestamp"]).filter(fg.timestamp > since).read()
+    if keys.empty:
+        return {}
+    latest = pd.to_datetime(keys["timestamp"]).dt.tz_localize(None).groupby(keys["city"]).max()
+    return {city: ts.to_pydatetime() for city, ts in latest.items()}
@@ -0,0 +1,117 @@
+import os
+import time
+import uuid
+import random
+import pandas as pd
+
+from src.config.config import FEATURE_GROUP_NAME, FEATURE_GROUP_VERSION
+from src.monitoring.spans import span
+
+BUFFER_DIR = f"data/state/{FEATURE_GROUP_NAME}_v{FEATURE_GROUP_VERSION}_pending"
+KEY_COLUMNS = ["city", "timestamp"]
+
+# Flush tuning
+MAX_BATCH_ROWS = 50_000     # rows per fg.insert call
+MAX_ATTEMPTS = 5
+BASE_DELAY = 2              # seconds, doubled per attempt
+MAX_DELAY = 60
+
+
+# --------------------------------------------------
+# Write-ahead buffer in front of fg.insert
+# --------------------------------------------------
+class WriteBuffer:
+    """
+    Rows bound for the feature store, persisted locally before any
+    insert is attempted. Each append() is one Parquet segment; flush()
+    coalesces every pending segment into deduplicated batches (last
+    write wins on city + timestamp) and deletes the segments only once
+    their rows are in the store. A failed flush keeps them for the next
+    run, and replaying a segment is safe because inserts upsert on the
+    same key.
+    """
+
+    def __init__(self, buffer_dir=BUFFER_DIR):
+        self.buffer_dir = buffer_dir
+
+    def _segments(self):
+        if not os.path.isdir(self.buffer_dir):
+            return []
+        return sorted(
+            os.path.join(self.buffer_dir, name)
+            for name in os.listdir(self.buffer_dir)
+            if name.startswith("segment_") and name.endswith(".parquet")
+        )
+
+    def append(self, df):
+        """
+        Persist rows for a later flush. Returns the segment path.
+        """
+        if df.empty:
+            return None
+        os.makedirs(self.buffer_dir, exist_ok=True)
+        # Name sorts by append time, so later segments win on dedup
+        name = f"segment_{time.time_ns()}_{uuid.uuid4().hex[:8]}.parquet"
+        path = os.path.join(self.buffer_dir, name)
+        tmp = path + ".tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        return path
+
+    def pending(self, segments=None):
+        """
+        All buffered rows, deduplicated on the primary key.
+        """
+        segments = self._segments() if segments is None else segments
+        frames = [pd.read_parquet(path) for path in segments]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        df = df.drop_duplicates(subset=KEY_COLUMNS, keep="last")
+        return df.sort_values(KEY_COLUMNS).reset_index(drop=True)
+
+    def flush(self, fg, max_batch_rows=MAX_BATCH_ROWS, max_attempts=MAX_ATTEMPTS,
+              base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+        """
+        Insert every pending row in batches of up to max_batch_rows,
+        retrying each batch with exponential backoff and jitter.
+        Returns True when the buffer is empty afterwards; on a store
+        outage the rows stay buffered and False is returned.
+        """
+        segments = self._segments()
+        df = self.pending(segments)
+        if df.empty:
+            return True
+
+        batches = [df.iloc[i:i + max_batch_rows] for i in range(0, len(df), max_batch_rows)]
+        with span("insert", rows=len(df), batches=len(batches), segments=len(segments)) as s:
+            for i, batch in enumerate(batches):
+                if not self._insert(fg, batch, max_attempts, base_delay, max_delay, s):
+                    # Keep what is left; earlier batches are upserted again on replay
+                    print(f"⚠ Feature store unavailable; {len(df)} row(s) kept in "
+                          f"{self.buffer_dir} for the next run.")
+                    s.set(flushed_batches=i)
+                    return False
+
+        for path in segments:
+            os.remove(path)
+        print(f"✅ {len(df)} buffered row(s) inserted in {len(batches)} batch(es).")
+        return True
+
+    @staticmethod
+    def _insert(fg, batch, max_attempts, base_delay, max_delay, s):
+        for attempt in range(max_attempts):
+            try:
+                fg.insert(
+                    batch,
+                    write_options={"start_offline_materialization": False}
+                )
+                s.set(attempts=attempt + 1)
+                return True
+            except Exception as e:
+                print(f"⚠ Insert attempt {attempt+1}/{max_attempts} failed: {e}")
+                if attempt < max_attempts - 1:
+                    time.sleep(min(max_delay, base_delay * 2 ** attempt) + random.random())
+        s.set(attempts=max_attempts)
+        return False
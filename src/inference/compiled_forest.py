@@ -0,0 +1,238 @@
+import threading
+import numpy as np
+
+COMPILED_ARTIFACT = "compiled_forest.npz"
+BATCH_ROWS = 4096       # rows traversed at once; bounds the (rows x trees) node matrix
+NATIVE_MIN_ROWS = 64    # larger batches go to the attached sklearn forest
+QUANT_LIMIT = 2**16     # uint16 feature indices / threshold ranks
+
+
+# --------------------------------------------------
+# Flat-array tree ensemble
+# --------------------------------------------------
+class CompiledForest:
+    """
+    A fitted RandomForestRegressor flattened into a handful of NumPy
+    arrays: every tree's nodes are concatenated, children hold global
+    node indices (-1 for leaves) and `roots` marks where each tree starts.
+
+    predict() walks all (row, tree) pairs one level per step with
+    vectorized gathers, so a small batch costs max_depth NumPy operations
+    instead of a Python call per tree. That wins for the few rows of a
+    single forecast but loses to sklearn's compiled traversal from about
+    a hundred rows on, so when a native forest is attached (see
+    attach_native) batches of NATIVE_MIN_ROWS or more are sent to it. Decisions match sklearn exactly:
+    float32 thresholds are rounded down to the largest float32 not above
+    the original, and quantized thresholds are ranks into the sorted
+    per-feature cut points, both of which preserve x <= t for the
+    float32 inputs sklearn compares against.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, node_weight, roots,
+                 max_depth, feature_names=None, cuts=None, cut_offsets=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.node_weight = node_weight
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.cuts = cuts
+        self.cut_offsets = cut_offsets
+        if feature_names is not None:
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+        # Leaves point at themselves so traversal needs no per-node branching
+        nodes = np.arange(len(feature), dtype=np.int32)
+        is_leaf = left < 0
+        self._left = np.where(is_leaf, nodes, left).astype(np.int32)
+        self._right = np.where(is_leaf, nodes, right).astype(np.int32)
+
+        self._native_loader = None
+        self._native = None
+        self._native_lock = threading.Lock()
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def quantized(self):
+        return self.cuts is not None
+
+    # ---------- compile ----------
+    @classmethod
+    def from_sklearn(cls, forest, dtype=np.float32, quantize=False):
+        """
+        Flatten a fitted RandomForestRegressor. `dtype` sets the storage
+        type of thresholds and node values; `quantize` stores each
+        threshold as a uint16 rank into that feature's sorted cut points
+        (float thresholds are kept if a feature has too many cut points).
+        """
+        trees = [est.tree_ for est in forest.estimators_]
+        sizes = np.array([t.node_count for t in trees])
+        roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+
+        def offset(children, start):
+            return np.where(children < 0, -1, children + start)
+
+        left = np.concatenate([offset(t.children_left, r) for t, r in zip(trees, roots)])
+        right = np.concatenate([offset(t.children_right, r) for t, r in zip(trees, roots)])
+        is_leaf = left < 0
+        feature = np.concatenate([t.feature for t in trees])
+        index_type = np.uint16 if forest.n_features_in_ <= QUANT_LIMIT else np.int32
+        feature = np.where(is_leaf, 0, feature).astype(index_type)
+        threshold = np.concatenate([t.threshold for t in trees])
+        threshold = np.where(is_leaf, np.inf, threshold)
+        value = np.concatenate([t.value[:, 0, 0] for t in trees]).astype(dtype)
+        node_weight = np.concatenate([t.weighted_n_node_samples for t in trees]).astype(np.float32)
+        max_depth = max(t.max_depth for t in trees)
+        names = getattr(forest, "feature_names_in_", None)
+
+        cuts = cut_offsets = None
+        per_feature = None
+        if quantize:
+            per_feature = [
+                np.unique(threshold[~is_leaf & (feature == j)])
+                for j in range(forest.n_features_in_)
+            ]
+            # Ranks must fit uint16, or they silently wrap around
+            widest = max((len(c) for c in per_feature), default=0)
+            if widest >= QUANT_LIMIT:
+                print(f"⚠ {widest} cut points on one feature do not fit uint16 ranks; "
+                      "keeping float thresholds.")
+                per_feature = None
+        if per_feature is not None:
+            cut_offsets = np.concatenate([[0], np.cumsum([len(c) for c in per_feature])])
+            cuts = np.concatenate(per_feature)
+            rank = np.zeros(len(threshold), dtype=np.uint16)
+            for j, c in enumerate(per_feature):
+                mask = ~is_leaf & (feature == j)
+                rank[mask] = np.searchsorted(c, threshold[mask])
+            threshold = rank
+        else:
+            stored = threshold.astype(dtype)
+            # Round down so float32 x <= stored exactly when x <= original
+            too_high = stored > threshold
+            stored[too_high] = np.nextafter(stored[too_high], dtype(-np.inf))
+            threshold = stored
+
+        return cls(feature, threshold, left.astype(np.int32), right.astype(np.int32),
+                   value, node_weight, roots, max_depth, names, cuts, cut_offsets)
+
+    # ---------- predict ----------
+    def _encode(self, X):
+        """
+        Inputs as compared by the trees: float32 values, or per-feature
+        cut ranks when quantized (x <= cut[k] iff rank(x) <= k).
+        """
+        if not self.quantized:
+            return X
+        codes = np.empty(X.shape, dtype=np.int32)
+        for j in range(X.shape[1]):
+            c = self.cuts[self.cut_offsets[j]:self.cut_offsets[j + 1]]
+            codes[:, j] = np.searchsorted(c, X[:, j], side="left")
+        return codes
+
+    # ---------- native fallback ----------
+    def attach_native(self, loader):
+        """
+        loader() returns the fitted sklearn forest this was compiled
+        from. It is called once, on the first batch of NATIVE_MIN_ROWS
+        rows or more, so single forecasts never pay for unpickling it.
+        """
+        self._native_loader = loader
+
+    def native(self):
+        """
+        The attached sklearn forest, or None if there is none or it failed to load.
+        """
+        if self._native is None and self._native_loader is not None:
+            with self._native_lock:
+                if self._native is None and self._native_loader is not None:
+                    try:
+                        self._native = self._native_loader()
+                    except Exception as e:
+                        print(f"⚠ Native forest unavailable, using compiled traversal: {e}")
+                        self._native_loader = None
+        return self._native
+
+    def predict(self, X):
+        if len(X) >= NATIVE_MIN_ROWS:
+            native = self.native()
+            if native is not None:
+                return np.asarray(native.predict(X), dtype=np.float64)
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), BATCH_ROWS):
+            batch = self._encode(X[start:start + BATCH_ROWS])
+            rows = np.arange(len(batch))[:, None]
+            node = np.broadcast_to(self.roots, (len(batch), self.n_trees))
+            for _ in range(self.max_depth):
+                go_left = batch[rows, self.feature[node]] <= self.threshold[node]
+                node = np.where(go_left, self._left[node], self._right[node])
+            out[start:start + len(batch)] = self.value[node].mean(axis=1, dtype=np.float64)
+        return out
+
+    # ---------- SHAP ----------
+    def to_shap(self):
+        """
+        The forest in shap's dict tree format, so TreeExplainer can run
+        on the compiled model without sklearn.
+        """
+        if self.quantized:
+            thresholds = np.zeros(len(self.threshold))
+            inner = self.left >= 0
+            idx = self.cut_offsets[self.feature[inner]] + self.threshold[inner]
+            thresholds[inner] = self.cuts[idx]
+        else:
+            thresholds = self.threshold.astype(np.float64)
+
+        ends = np.append(self.roots[1:], len(self.feature))
+        trees = []
+        for start, end in zip(self.roots, ends):
+            left = self.left[start:end]
+            right = self.right[start:end]
+            trees.append({
+                "children_left": np.where(left < 0, -1, left - start).astype(np.int32),
+                "children_right": np.where(right < 0, -1, right - start).astype(np.int32),
+                "children_default": np.where(left < 0, -1, left - start).astype(np.int32),
+                "features": np.where(left < 0, -2, self.feature[start:end]).astype(np.int32),
+                "thresholds": thresholds[start:end],
+                "values": self.value[start:end].astype(np.float64)[:, None] / self.n_trees,
+                "node_sample_weight": self.node_weight[start:end].astype(np.float64),
+            })
+        return {"trees": trees, "base_offset": 0.0}
+
+    # ---------- persistence ----------
+    def save(self, path):
+        arrays = {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "value": self.value,
+            "node_weight": self.node_weight,
+            "roots": self.roots,
+            "max_depth": np.array(self.max_depth),
+        }
+        if hasattr(self, "feature_names_in_"):
+            arrays["feature_names"] = self.feature_names_in_.astype(str)
+        if self.quantized:
+            arrays["cuts"] = self.cuts
+            arrays["cut_offsets"] = self.cut_offsets
+        # Uncompressed: loading is a straight read of the arrays
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {k: data[k] for k in data.files}
+        return cls(
+            arrays["feature"], arrays["threshold"], arrays["left"], arrays["right"],
+            arrays["value"], arrays["node_weight"], arrays["roots"], arrays["max_depth"],
+            arrays.get("feature_names"), arrays.get("cuts"), arrays.get("cut_offsets"),
+        )
@@ -0,0 +1,188 @@
+import os
+import time
+import threading
+import numpy as np
+
+# shap is imported where it is used: it pulls in sklearn, numba and
+# friends, which would otherwise dominate the dashboard's import time.
+TIME_BUDGET = float(os.getenv("EXPLAIN_TIME_BUDGET", "5"))  # seconds per explain call
+BACKGROUND_SIZE = 100
+MIN_KERNEL_SAMPLES = 50
+MAX_KERNEL_SAMPLES = 2048
+
+
+# --------------------------------------------------
+# Model unwrapping
+# --------------------------------------------------
+def unwrap_model(model):
+    """
+    Return the native estimator behind an mlflow pyfunc wrapper,
+    or the model itself if it is not wrapped.
+    """
+    impl = getattr(model, "_model_impl", model)
+    for attr in ("sklearn_model", "model"):
+        if hasattr(impl, attr):
+            return getattr(impl, attr)
+    python_model = getattr(impl, "python_model", None)
+    if python_model is not None and hasattr(python_model, "model"):
+        return python_model.model
+    return impl
+
+
+def is_linear(model):
+    return hasattr(model, "coef_") and hasattr(model, "intercept_")
+
+
+def is_tree(model):
+    return hasattr(model, "estimators_") or hasattr(model, "tree_")
+
+
+# --------------------------------------------------
+# Explainers
+# --------------------------------------------------
+class LinearExplainer:
+    """
+    Exact closed-form SHAP for linear models:
+    phi_j = w_j * (x_j - mean_j), base = intercept + w . mean
+    """
+
+    kind = "linear"
+
+    def __init__(self, model, background):
+        self.coef = np.ravel(model.coef_)
+        self.mean = background.mean(axis=0).to_numpy(dtype=float)
+        self.base_value = float(np.ravel(model.intercept_)[0] + self.coef @ self.mean)
+
+    def __call__(self, X):
+        import shap
+
+        values = (X.to_numpy(dtype=float) - self.mean) * self.coef
+        return shap.Explanation(
+            values=values,
+            base_values=np.full(len(X), self.base_value),
+            data=X.to_numpy(),
+            feature_names=list(X.columns),
+        )
+
+
+class TreeExplainer:
+    """
+    Path-dependent TreeSHAP; needs no background data.
+    """
+
+    kind = "tree"
+
+    def __init__(self, model):
+        import shap
+
+        self.explainer = shap.TreeExplainer(model)
+
+    def __call__(self, X):
+        import shap
+
+        values = np.asarray(self.explainer.shap_values(X))
+        base_value = np.ravel(self.explainer.expected_value)[0]
+        return shap.Explanation(
+            values=values,
+            base_values=np.full(len(X), base_value),
+            data=X.to_numpy(),
+            feature_names=list(X.columns),
+        )
+
+
+class SampledExplainer:
+    """
+    Model-agnostic KernelSHAP over a sampled background set. The number
+    of coalition samples is sized from a measured predict cost so one
+    call stays within `time_budget` seconds.
+    """
+
+    kind = "sampled"
+
+    def __init__(self, predict, background, time_budget=TIME_BUDGET,
+                 background_size=BACKGROUND_SIZE):
+        import shap
+
+        if len(background) > background_size:
+            background = shap.sample(background, background_size, random_state=0)
+        self.background = background
+        self.explainer = shap.KernelExplainer(predict, background)
+        self.time_budget = time_budget
+
+        start = time.perf_counter()
+        predict(background)
+        self.seconds_per_eval = max(time.perf_counter() - start, 1e-6)
+
+    def _nsamples(self, n_rows):
+        per_row = self.time_budget / max(n_rows, 1)
+        nsamples = int(per_row / self.seconds_per_eval)
+        return max(MIN_KERNEL_SAMPLES, min(MAX_KERNEL_SAMPLES, nsamples))
+
+    def __call__(self, X):
+        import shap
+
+        values = self.explainer.shap_values(X, nsamples=self._nsamples(len(X)), silent=True)
+        values = np.asarray(values).reshape(len(X), -1)
+        base_value = np.ravel(self.explainer.expected_value)[0]
+        return shap.Explanation(
+            values=values,
+            base_values=np.full(len(X), base_value),
+            data=X.to_numpy(),
+            feature_names=list(X.columns),
+        )
+
+
+def build_explainer(model, background, time_budget=TIME_BUDGET):
+    """
+    Pick the cheapest exact explainer the model supports.
+    """
+    inner = unwrap_model(model)
+    if is_linear(inner):
+        return LinearExplainer(inner, background)
+    if hasattr(inner, "to_shap"):
+        # Compiled forest: shap reads its dict tree format directly
+        return TreeExplainer(inner.to_shap())
+    if is_tree(inner):
+        try:
+            return TreeExplainer(inner)
+        except Exception as e:
+            print(f"⚠ TreeExplainer unavailable, using sampled explainer: {e}")
+    return SampledExplainer(model.predict, background, time_budget)
+
+
+# --------------------------------------------------
+# Per-model-version cache
+# --------------------------------------------------
+_explainers = {}
+_lock = threading.Lock()
+
+
+def get_explainer(model, version, background, time_budget=TIME_BUDGET):
+    """
+    Build the explainer once per model version and reuse it.
+    `background` is a DataFrame or a callable returning one; it is
+    only evaluated when a new explainer has to be built.
+    """
+    key = version if version is not None else id(model)
+    with _lock:
+        if key not in _explainers:
+            if callable(background):
+                background = background()
+            _explainers.clear()  # only the current version is worth keeping
+            _explainers[key] = build_explainer(model, background, time_budget)
+        return _explainers[key]
+
+
+def explain(model, X, version=None, background=None, time_budget=TIME_BUDGET):
+    """
+    SHAP values for the rows of X as a shap.Explanation.
+    Falls back to X itself when no background rows are available.
+    """
+    def resolve_background():
+        data = background() if callable(background) else background
+        if data is None or data.empty:
+            return X
+        return data[list(X.columns)]
+
+    explainer = get_explainer(model, version, resolve_background, time_budget)
+    return explainer(X)
@@ -0,0 +1,137 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+FORECAST_DIR = "data/forecasts"
+REMOTE_DIR = "Resources/aqi_forecasts"
+LATEST_FILE = "LATEST"
+KEEP_VERSIONS = 48
+
+
+# --------------------------------------------------
+# Serialization
+# --------------------------------------------------
+class StoredExplanation:
+    """
+    Minimal stand-in for shap.Explanation rebuilt from the store,
+    exposing the attributes the dashboard reads.
+    """
+
+    def __init__(self, values, base_values, feature_names):
+        self.values = np.asarray(values, dtype=float)
+        self.base_values = np.asarray(base_values, dtype=float)
+        self.feature_names = list(feature_names)
+
+
+def to_record(preds, shap_values, future_df, recent, model_version=None):
+    """
+    Flatten one inference run into a JSON-serialisable dict.
+    """
+    values = np.asarray(getattr(shap_values, "values", shap_values), dtype=float)
+    base_values = getattr(shap_values, "base_values", np.zeros(len(future_df)))
+    recent = recent.copy()
+    if "timestamp" in recent:
+        recent["timestamp"] = pd.to_datetime(recent["timestamp"]).dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+    return {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "model_version": model_version,
+        "preds": np.asarray(preds, dtype=float).tolist(),
+        "feature_names": list(future_df.columns),
+        "future_features": future_df.to_dict(orient="records"),
+        "shap_values": values.tolist(),
+        "shap_base_values": np.asarray(base_values, dtype=float).ravel().tolist(),
+        "recent": recent.to_dict(orient="records"),
+    }
+
+
+def from_record(record):
+    """
+    Inverse of to_record: returns (preds, explanation, future_df, recent).
+    """
+    future_df = pd.DataFrame(record["future_features"], columns=record["feature_names"])
+    explanation = StoredExplanation(
+        record["shap_values"], record["shap_base_values"], record["feature_names"]
+    )
+    recent = pd.DataFrame(record["recent"])
+    if "timestamp" in recent:
+        recent["timestamp"] = pd.to_datetime(recent["timestamp"])
+    return np.asarray(record["preds"]), explanation, future_df, recent
+
+
+# --------------------------------------------------
+# Versioned forecast store
+# --------------------------------------------------
+class ForecastStore:
+    """
+    Versioned JSON forecasts under `local_dir`, one file per run plus a
+    LATEST pointer. When a Hopsworks dataset API is given, writes are
+    uploaded to `remote_dir` and reads pull the pointer first, then the
+    forecast file only if that version is not already local.
+    """
+
+    def __init__(self, local_dir=FORECAST_DIR, dataset_api=None, remote_dir=REMOTE_DIR):
+        self.local_dir = local_dir
+        self.dataset_api = dataset_api
+        self.remote_dir = remote_dir
+
+    def _path(self, name):
+        return os.path.join(self.local_dir, name)
+
+    @staticmethod
+    def _file_name(version):
+        return f"forecast-{version}.json"
+
+    def write(self, record):
+        os.makedirs(self.local_dir, exist_ok=True)
+        version = record["created_at"].replace(":", "").replace("-", "")
+        name = self._file_name(version)
+
+        with open(self._path(name), "w") as f:
+            json.dump(record, f, separators=(",", ":"))
+        with open(self._path(LATEST_FILE), "w") as f:
+            f.write(version)
+
+        if self.dataset_api is not None:
+            self.dataset_api.upload(self._path(name), self.remote_dir, overwrite=True)
+            self.dataset_api.upload(self._path(LATEST_FILE), self.remote_dir, overwrite=True)
+
+        self.prune()
+        return version
+
+    def latest_version(self):
+        if self.dataset_api is not None:
+            os.makedirs(self.local_dir, exist_ok=True)
+            self.dataset_api.download(
+                f"{self.remote_dir}/{LATEST_FILE}", self._path(LATEST_FILE), overwrite=True
+            )
+        if not os.path.exists(self._path(LATEST_FILE)):
+            return None
+        with open(self._path(LATEST_FILE)) as f:
+            return f.read().strip() or None
+
+    def read(self, version):
+        name = self._file_name(version)
+        if not os.path.exists(self._path(name)) and self.dataset_api is not None:
+            self.dataset_api.download(
+                f"{self.remote_dir}/{name}", self._path(name), overwrite=True
+            )
+        with open(self._path(name)) as f:
+            return json.load(f)
+
+    def latest(self):
+        version = self.latest_version()
+        return self.read(version) if version else None
+
+    def prune(self, keep=KEEP_VERSIONS):
+        """
+        Drop all but the newest `keep` local forecast files.
+        """
+        files = sorted(
+            n for n in os.listdir(self.local_dir)
+            if n.startswith("forecast-") and n.endswith(".json")
+        )
+        for name in files[:-keep]:
+            os.remove(self._path(name))
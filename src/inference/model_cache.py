@@ -0,0 +1,143 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+
+from src.inference.compiled_forest import CompiledForest, COMPILED_ARTIFACT
+from src.storage.backend import tracking_uri
+
+TRACKING_URI = tracking_uri()
+MODEL_NAME = "AQI_Predictor_Best"
+ARTIFACT_DIR = "data/cache/models"
+VERSION_CHECK_TTL = int(os.getenv("MODEL_VERSION_TTL", "300"))  # seconds
+
+
+# --------------------------------------------------
+# Process-wide model cache
+# --------------------------------------------------
+class ModelCache:
+    """
+    Keeps the deserialized model in memory and re-checks the registry
+    version at most once per `ttl` seconds. Artifacts are stored on
+    local disk under <artifact_dir>/<version>/, so only a new version
+    triggers a download, and a process can start from the newest local
+    artifact when the registry is unreachable.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, artifact_dir=ARTIFACT_DIR,
+                 ttl=VERSION_CHECK_TTL):
+        self.model_name = model_name
+        self.artifact_dir = artifact_dir
+        self.ttl = ttl
+        self.model = None
+        self.version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    # ---------- registry ----------
+    def latest_version(self):
+        """
+        Cheap metadata lookup of the newest registered version.
+        """
+        from mlflow.tracking import MlflowClient
+
+        client = MlflowClient()
+        versions = client.search_model_versions(f"name='{self.model_name}'")
+        if not versions:
+            return None
+        return str(max(int(v.version) for v in versions))
+
+    # ---------- local artifacts ----------
+    def _local_path(self, version):
+        return os.path.join(self.artifact_dir, str(version))
+
+    def local_versions(self):
+        if not os.path.isdir(self.artifact_dir):
+            return []
+        return sorted(
+            (d for d in os.listdir(self.artifact_dir) if d.isdigit()), key=int
+        )
+
+    def _download(self, version):
+        import mlflow
+
+        path = self._local_path(version)
+        if os.path.isdir(path):
+            return path
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=self.artifact_dir, prefix=".download-")
+        try:
+            mlflow.artifacts.download_artifacts(
+                artifact_uri=f"models:/{self.model_name}/{version}", dst_path=tmp
+            )
+            os.replace(tmp, path)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return path
+
+    def _load(self, version):
+        import mlflow
+
+        path = self._download(version)
+        compiled = os.path.join(path, COMPILED_ARTIFACT)
+        if os.path.exists(compiled):
+            # Flat arrays: no unpickling, no pyfunc wrapper per call. Large
+            # batches (ensembles) go to the pickled forest, loaded on first use
+            self.model = CompiledForest.load(compiled)
+            self.model.attach_native(lambda: load_sklearn(path))
+        else:
+            self.model = mlflow.pyfunc.load_model(path)
+        self.version = version
+
+    # ---------- public ----------
+    def get(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.model is not None and now - self._checked_at < self.ttl:
+                return self.model
+
+            try:
+                version = self.latest_version()
+            except Exception as e:
+                version = None
+                print(f"⚠ Model registry unreachable: {e}")
+            self._checked_at = now
+
+            if version is not None and version != self.version:
+                self._load(version)
+            elif self.model is None:
+                local = self.local_versions()
+                if not local:
+                    raise RuntimeError(
+                        f"No registered or cached version of {self.model_name} available"
+                    )
+                print(f"Loading cached model version {local[-1]} from {self.artifact_dir}")
+                self._load(local[-1])
+
+            return self.model
+
+    def clear(self):
+        with self._lock:
+            self.model = None
+            self.version = None
+            self._checked_at = 0.0
+
+
+def load_sklearn(path):
+    import mlflow.sklearn
+
+    return mlflow.sklearn.load_model(path)
+
+
+_model_cache = None
+
+
+def get_model_cache():
+    global _model_cache
+    if _model_cache is None:
+        import mlflow   # deferred: mlflow and its flavors are slow to import
+
+        mlflow.set_tracking_uri(TRACKING_URI)
+        _model_cache = ModelCache()
+    return _model_cache
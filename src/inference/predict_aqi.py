@@ -1,135 +1,338 @@
 import os
 import pandas as pd
 import numpy as np
-import mlflow
-import hopsworks
-import shap
 from datetime import datetime, timedelta
 
+from src.config.config import FEATURE_GROUP_NAME, FEATURE_GROUP_VERSION, PRIMARY_CITY
+from src.features.feature_cache import FeatureCache
+from src.features.feature_engine import FeatureEngine, POLLUTANTS, TIME_FEATURES, derive
+from src.ingestion.locations import locations_frame
+from src.inference.model_cache import get_model_cache
+from src.inference.explain import explain, unwrap_model, BACKGROUND_SIZE
+from src.monitoring.spans import span
+from src.storage import backend
+
 # --------------------------------------------------
 # Load model from MLflow (DagsHub)
 # --------------------------------------------------
 def load_model():
-    mlflow.set_tracking_uri(
-        "https://dagshub.com/AfifaSiddiquee/AQIPredictorProject.mlflow/"
-    )
+    """
+    Return the current AQI model from the process-wide cache.
+    The registry is only contacted when the version check TTL expires,
+    and only a new version triggers a download.
+    """
+    with span("model_load"):
+        return get_model_cache().get()
+
+
+# --------------------------------------------------
+# Hopsworks handles (logged in once per process)
+# --------------------------------------------------
+_project = None
+_feature_group = None
+
+
+def get_project():
+    global _project
+    if _project is None:
+        with span("login"):
+            _project = backend.login(api_key_value=os.environ.get("HOPSWORKS_API_KEY"))
+    return _project
 
-    os.environ["MLFLOW_TRACKING_USERNAME"] = os.environ.get("MLFLOW_TRACKING_USERNAME")
-    os.environ["MLFLOW_TRACKING_PASSWORD"] = os.environ.get("MLFLOW_TRACKING_PASSWORD")
 
-    model = mlflow.pyfunc.load_model("models:/AQI_Predictor_Best/latest")
-    return model
+def get_feature_group():
+    global _feature_group
+    if _feature_group is None:
+        fs = get_project().get_feature_store()
+        _feature_group = fs.get_feature_group(FEATURE_GROUP_NAME, version=FEATURE_GROUP_VERSION)
+    return _feature_group
 
 
 # --------------------------------------------------
 # Fetch last N days features from Hopsworks
 # --------------------------------------------------
-def fetch_last_n_days(n=7):
-    project = hopsworks.login(api_key_value=os.environ.get("HOPSWORKS_API_KEY"))
-    fs = project.get_feature_store()
-    fg = fs.get_feature_group("karachi_aqi_features", version=1)
+def refreshed_cache():
+    """
+    The local feature cache, topped up with rows newer than its
+    high-water mark. Cached rows are served if Hopsworks is unreachable.
+    """
+    cache = FeatureCache()
+    try:
+        cache.refresh(get_feature_group())
+    except Exception as e:
+        if cache.high_water_mark() is None:
+            raise
+        print(f"⚠ Feature cache refresh failed, serving cached rows: {e}")
+    return cache
+
+
+def fetch_last_n_days(n=7, city=PRIMARY_CITY):
+    """
+    Latest n feature rows for one location, newest first.
+    Only rows newer than the local cache's high-water mark are pulled
+    from Hopsworks; the answer itself is served from the cache.
+    """
+    with span("fetch", source="feature_cache") as s:
+        return s.rows(refreshed_cache().last_n(n, city=city))
+
+
+STATION_MAX_AGE_HOURS = 3   # older readings are left off the station map
+
+
+def latest_station_readings(max_age_hours=STATION_MAX_AGE_HOURS):
+    """
+    Newest reading per configured location with its coordinates:
+    city, label, lat, lon, timestamp, aqi and pollutants.
+    """
+    with span("fetch", source="stations") as s:
+        recent = refreshed_cache().last_hours(max_age_hours)
+        stations = locations_frame()
+        if not recent.empty:
+            # last_hours counts back from the newest cached row; age is from now
+            cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+            recent = recent[recent["timestamp"] > cutoff]
+        if recent.empty:
+            return s.rows(stations.iloc[0:0])
+        latest = (
+            recent.sort_values("timestamp")
+            .drop_duplicates(subset=["city"], keep="last")
+            [["city", "timestamp", "aqi"] + POLLUTANTS]
+        )
+        return s.rows(stations.merge(latest, on="city", how="inner"))
+
+
+FORECAST_DAYS = 3
+CONTEXT_HOURS = 7 * 24   # history used to warm up lag / window features
 
-    df = fg.read()
-    df = df.sort_values("timestamp", ascending=False)
 
-    return df.head(n)
+# --------------------------------------------------
+# Forecast pollutant scenarios (vectorized)
+# --------------------------------------------------
+def forecast_pollutant_scenarios(last_n_days_df, n_scenarios=1,
+                                 horizon=FORECAST_DAYS, seed=None):
+    """
+    Draw pollutant trajectories as one array of shape
+    (n_scenarios, horizon, len(POLLUTANTS)):
+    recent mean + damped recent slope + uniform(-1, 1) noise.
+    """
+    rng = np.random.default_rng(seed)
+    values = last_n_days_df[POLLUTANTS].to_numpy(dtype=float)
+
+    mean_vals = values.mean(axis=0)
+    if len(values) >= 3:
+        slopes = (values[0] - values[2]) / 2
+    else:
+        slopes = np.zeros(len(POLLUTANTS))
+
+    steps = np.arange(horizon)[:, None] * 1.5
+    trend = mean_vals + slopes * steps
+    noise = rng.uniform(-1, 1, size=(n_scenarios, horizon, len(POLLUTANTS)))
+    return trend[None, :, :] + noise
 
 
 # --------------------------------------------------
 # Forecast pollutants for next 3 days (demo logic)
 # --------------------------------------------------
-def forecast_pollutants_demo(last_n_days_df):
+def forecast_pollutants_demo(last_n_days_df, seed=None):
+
+    scenario = forecast_pollutant_scenarios(last_n_days_df, n_scenarios=1, seed=seed)[0]
+    return [dict(zip(POLLUTANTS, day)) for day in scenario]
 
-    pollutants = ["pm25", "pm10", "co", "no2", "so2", "o3"]
 
-    mean_vals = last_n_days_df[pollutants].mean()
+# --------------------------------------------------
+# Time features for forecast dates
+# --------------------------------------------------
+def forecast_dates(horizon=FORECAST_DAYS, now=None):
+    now = now or datetime.utcnow()
+    return pd.DatetimeIndex([now + timedelta(days=i) for i in range(horizon)])
 
-    if len(last_n_days_df) >= 3:
-        slopes = {
-            p: (last_n_days_df[p].iloc[0] - last_n_days_df[p].iloc[2]) / 2
-            for p in pollutants
-        }
+
+def time_features(dates):
+    """
+    (len(dates), 4) array of hour, day, month, weekday.
+    """
+    return np.column_stack(
+        [dates.hour, dates.day, dates.month, dates.weekday]
+    ).astype(np.int64)
+
+
+# --------------------------------------------------
+# Windowed features for forecast scenarios
+# --------------------------------------------------
+def recent_history(fallback=None, hours=CONTEXT_HOURS, city=PRIMARY_CITY):
+    """
+    Recent observations (oldest first) used as lag / window context.
+    """
+    history = FeatureCache().last_n(hours, city=city)
+    if history.empty and fallback is not None:
+        history = fallback
+    return history.sort_values("timestamp")
+
+
+def hourly_path(last_values, scenarios, offsets):
+    """
+    Hour-by-hour pollutant path (n_scenarios, offsets[-1], P) that
+    starts from last_values (hour 0) and passes through scenario day i
+    at hour offsets[i], linearly interpolated in between.
+    """
+    n_scenarios = scenarios.shape[0]
+    start = np.broadcast_to(np.asarray(last_values)[..., None, :], (n_scenarios, 1, scenarios.shape[2]))
+    anchors = np.concatenate([start, scenarios], axis=1)           # (S, horizon + 1, P)
+    xp = np.r_[0, offsets]
+    hours = np.arange(1, offsets[-1] + 1)
+    right = np.searchsorted(xp, hours, side="left")
+    weight = ((hours - xp[right - 1]) / (xp[right] - xp[right - 1]))[None, :, None]
+    return anchors[:, right - 1, :] * (1 - weight) + anchors[:, right, :] * weight
+
+
+def scenario_features(scenarios, dates, history):
+    """
+    Full feature matrix for (n_scenarios, horizon, P) pollutant scenarios.
+    Each scenario continues the engine's window state built from
+    `history` on the same hourly grid as training: the path from the
+    last observed hour to each forecast date is filled in hour by hour,
+    so lag_1 is one hour back and roll_24h spans 24 hours. Returns a
+    DataFrame of n_scenarios * horizon rows in FeatureEngine.feature_names order.
+    """
+    engine = FeatureEngine()
+    n_scenarios, horizon, _ = scenarios.shape
+    hours = pd.DatetimeIndex(dates).floor("h")
+
+    city_state = next(iter(engine.fit_state(history).values()), None) if not history.empty else None
+    if city_state is not None:
+        context = np.asarray(city_state["buffer"], dtype=float)
+        seed = {int(k): np.asarray(v, dtype=float) for k, v in city_state["ewm"].items()}
+        last_hour = pd.Timestamp(city_state["last_timestamp"]).floor("h")
+        last_values = pd.DataFrame(context).ffill().to_numpy()[-1]
     else:
-        slopes = {p: 0 for p in pollutants}
+        context = np.empty((0, len(POLLUTANTS)))
+        seed = None
+        last_hour = hours[0] - pd.Timedelta(hours=1)
+        last_values = np.full(len(POLLUTANTS), np.nan)
+
+    # Hour offset of each forecast date after the last observation. Stale
+    # history is pulled forward to one context length before the first date:
+    # older hours only feed the EWMAs, and the path stays short.
+    last_hour = max(last_hour, hours[0] - pd.Timedelta(hours=engine.context_size))
+    offsets = ((hours - last_hour) // pd.Timedelta(hours=1)).to_numpy()
+    offsets = np.maximum.accumulate(np.maximum(offsets, 1) + np.arange(horizon)) - np.arange(horizon)
+    last_values = np.where(np.isnan(last_values), scenarios[:, 0, :], last_values)
+
+    path = hourly_path(last_values, scenarios, offsets)
+    values = np.concatenate(
+        [np.broadcast_to(context, (n_scenarios,) + context.shape), path], axis=1
+    )
+    derived, _ = derive(
+        values, n_context=len(context), ewm_seed=seed,
+        lags=engine.lags, windows=engine.windows, spans=engine.spans,
+        rows=offsets - 1
+    )
 
-    future_pollutants = []
+    calendar = np.broadcast_to(
+        time_features(dates), (n_scenarios, horizon, len(TIME_FEATURES))
+    )
+    blocks = [scenarios, calendar] + [derived[k] for k in derived]
+    matrix = np.concatenate(blocks, axis=2).reshape(n_scenarios * horizon, -1)
+
+    columns = POLLUTANTS + TIME_FEATURES + [
+        f"{p}_{k}" for k in derived for p in POLLUTANTS
+    ]
+    features = pd.DataFrame(matrix, columns=columns)[engine.feature_names]
+    features[TIME_FEATURES] = features[TIME_FEATURES].astype(np.int64)
+    return features
 
-    for i in range(3):
-        day_vals = {}
-        for p in pollutants:
-            day_vals[p] = (
-                mean_vals[p]
-                + slopes.get(p, 0) * i * 1.5
-                + np.random.uniform(-1, 1)
-            )
-        future_pollutants.append(day_vals)
 
-    return future_pollutants
+def select_model_features(model, df):
+    """
+    Keep the columns the model was trained on, in training order, so
+    models trained on an older feature set keep working.
+    """
+    names = getattr(unwrap_model(model), "feature_names_in_", None)
+    if names is None:
+        return df
+    return df[list(names)]
 
 
 # --------------------------------------------------
 # Generate future features
 # --------------------------------------------------
-def generate_future_features():
+def generate_future_features(last_n_days=None, seed=None):
 
-    last_n_days = fetch_last_n_days(7)
-    forecast_vals_list = forecast_pollutants_demo(last_n_days)
+    if last_n_days is None:
+        last_n_days = fetch_last_n_days(7)
+    scenarios = forecast_pollutant_scenarios(last_n_days, n_scenarios=1, seed=seed)
 
-    future_dates = [
-        datetime.utcnow(),
-        datetime.utcnow() + timedelta(days=1),
-        datetime.utcnow() + timedelta(days=2),
-    ]
+    future_df = scenario_features(
+        scenarios, forecast_dates(), recent_history(fallback=last_n_days)
+    )
 
-    rows = []
+    return future_df
 
-    for i, date in enumerate(future_dates):
-        row = forecast_vals_list[i].copy()
-        row["hour"] = date.hour
-        row["day"] = date.day
-        row["month"] = date.month
-        row["weekday"] = date.weekday()
-        rows.append(row)
 
-    future_df = pd.DataFrame(rows)
+# --------------------------------------------------
+# Monte-Carlo ensemble forecast with uncertainty bands
+# --------------------------------------------------
+def get_3day_aqi_ensemble(n_scenarios=1000, percentiles=(5, 50, 95),
+                          seed=None, last_n_days=None):
+    """
+    Predict AQI over n_scenarios pollutant trajectories with a single
+    model.predict call on the stacked (n_scenarios * 3, n_features) matrix.
+    Returns one row per forecast day with mean and percentile bands.
+    """
+    model = load_model()
+    if last_n_days is None:
+        last_n_days = fetch_last_n_days(7)
 
-    return future_df
+    scenarios = forecast_pollutant_scenarios(
+        last_n_days, n_scenarios=n_scenarios, seed=seed
+    )
+    dates = forecast_dates()
+    features = scenario_features(
+        scenarios, dates, recent_history(fallback=last_n_days)
+    )
+
+    with span("predict", rows=len(features), scenarios=n_scenarios):
+        preds = np.asarray(
+            model.predict(select_model_features(model, features))
+        ).reshape(n_scenarios, len(dates))
+
+    bands = pd.DataFrame({"mean": preds.mean(axis=0)})
+    for q, values in zip(percentiles, np.percentile(preds, percentiles, axis=0)):
+        bands[f"p{q}"] = values
+    bands = bands.round(2)
+    bands.insert(0, "date", dates)
+    return bands
 
 
 # --------------------------------------------------
 # Main function — AQI Prediction + Optional SHAP
 # --------------------------------------------------
-def get_3day_aqi(return_explanations=False):
+def get_3day_aqi(return_explanations=False, last_n_days=None, seed=None):
 
     model = load_model()
-    future_df = generate_future_features()
+    with span("transform", source="forecast"):
+        future_df = select_model_features(
+            model, generate_future_features(last_n_days, seed=seed)
+        )
 
     # ---------------------------------------------
     # Predictions
     # ---------------------------------------------
-    preds = model.predict(future_df)
+    with span("predict", rows=len(future_df)):
+        preds = model.predict(future_df)
     preds = np.round(preds, 1)
 
     # ---------------------------------------------
     # SHAP Explanation (optional)
     # ---------------------------------------------
     if return_explanations:
-        try:
-            # Try to access underlying model safely
-            if hasattr(model, "_model_impl"):
-                inner_model = model._model_impl.python_model.model
-            elif hasattr(model, "python_model"):
-                inner_model = model.python_model.model
-            else:
-                inner_model = model
-
-            explainer = shap.TreeExplainer(inner_model)
-            shap_values = explainer.shap_values(future_df)
-
-        except Exception:
-            # Fallback generic explainer
-            explainer = shap.Explainer(model.predict, future_df)
-            shap_values = explainer(future_df)
+        # Background rows are only read when the explainer is (re)built
+        with span("shap", rows=len(future_df)):
+            shap_values = explain(
+                model, future_df,
+                version=get_model_cache().version,
+                background=lambda: FeatureCache().last_n(BACKGROUND_SIZE)
+            )
 
         return preds, shap_values, future_df
 
@@ -0,0 +1,48 @@
+import time
+
+from src.monitoring.spans import span
+
+
+# --------------------------------------------------
+# Prewarm: pay the cold-start costs before the first user does
+# --------------------------------------------------
+def prewarm(provider=None, build_snapshot=True):
+    """
+    Import the deferred heavy modules, load the current model into the
+    process-wide cache and, when a SnapshotProvider is given, build its
+    first snapshot. Safe to call from a background thread. Returns
+    {step: seconds}.
+    """
+    timings = {}
+
+    def step(name, fn):
+        start = time.perf_counter()
+        try:
+            with span("prewarm", step=name):
+                fn()
+        except Exception as e:
+            print(f"⚠ Prewarm step '{name}' failed: {e}")
+        timings[name] = round(time.perf_counter() - start, 3)
+
+    step("import_shap", lambda: __import__("shap"))
+    step("import_mlflow", lambda: __import__("mlflow.pyfunc"))
+
+    from src.inference.predict_aqi import load_model
+    step("model_load", load_model)
+    # Pickled forest behind the compiled one, used for ensemble-size batches
+    step("native_model", lambda: getattr(load_model(), "native", lambda: None)())
+
+    if build_snapshot:
+        if provider is None:
+            from src.inference.snapshot import build_snapshot as build
+        else:
+            build = provider.get
+        step("snapshot", build)
+    return timings
+
+
+if __name__ == "__main__":
+    # e.g. as a container start hook before `streamlit run app/app.py`:
+    # fills data/cache (model artifacts, feature cache, forecast)
+    for name, seconds in prewarm().items():
+        print(f"{name:<15} {seconds:>8.3f}s")
@@ -0,0 +1,209 @@
+import time
+import zlib
+import queue
+import threading
+import numpy as np
+import pandas as pd
+from concurrent.futures import Future
+from datetime import datetime
+
+from src.config.config import PRIMARY_CITY
+from src.features.feature_cache import FeatureCache
+from src.inference.predict_aqi import (
+    load_model, refreshed_cache, recent_history, forecast_pollutant_scenarios,
+    scenario_features, forecast_dates, select_model_features
+)
+from src.inference.model_cache import get_model_cache
+from src.inference.explain import explain, BACKGROUND_SIZE
+from src.inference.forecast_store import to_record
+from src.monitoring.spans import span
+
+MAX_BATCH_REQUESTS = 64      # forecasts combined into one model.predict
+MAX_BATCH_WAIT = 0.005       # seconds the first request waits for company
+N_RECENT = 7
+
+
+# --------------------------------------------------
+# Micro-batching of concurrent predict calls
+# --------------------------------------------------
+class MicroBatcher:
+    """
+    Collects feature frames submitted from many threads and scores
+    them with one model.predict call per batch. A batch closes when it
+    holds max_batch requests or max_wait seconds after its first one.
+    """
+
+    def __init__(self, predict=None, max_batch=MAX_BATCH_REQUESTS, max_wait=MAX_BATCH_WAIT):
+        self.predict = predict or (lambda X: load_model().predict(X))
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, features):
+        """
+        Queue one feature frame; the Future resolves to its predictions.
+        """
+        future = Future()
+        self._queue.put((features, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            frames = [features for features, _ in batch]
+            try:
+                with span("predict", rows=sum(len(f) for f in frames), requests=len(batch)):
+                    preds = np.asarray(self.predict(pd.concat(frames, ignore_index=True)))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for features, future in batch:
+                future.set_result(preds[offset:offset + len(features)])
+                offset += len(features)
+
+
+# --------------------------------------------------
+# In-memory forecast service
+# --------------------------------------------------
+def forecast_hour(now=None):
+    now = now or datetime.utcnow()
+    return now.replace(minute=0, second=0, microsecond=0)
+
+
+class ForecastService:
+    """
+    Long-lived forecaster for the HTTP API. Per forecast hour it keeps
+    each city's recent features in memory and one response per
+    (city, hour, explain). Concurrent requests for the same key share a
+    single computation, and different keys are micro-batched into one
+    model.predict.
+    """
+
+    def __init__(self, batcher=None, n_recent=N_RECENT):
+        self.batcher = batcher or MicroBatcher()
+        self.n_recent = n_recent
+        self._hour = None
+        self._inputs = {}       # city -> (recent, history)
+        self._responses = {}    # (city, explain) -> response dict or Future
+        self._lock = threading.Lock()
+
+    def _roll_hour(self):
+        """
+        Drop the previous hour's inputs and responses. Call with the lock held.
+        """
+        hour = forecast_hour()
+        if hour != self._hour:
+            self._hour = hour
+            self._inputs.clear()
+            self._responses.clear()
+            try:
+                refreshed_cache()
+            except Exception as e:
+                print(f"⚠ Feature cache refresh failed: {e}")
+        return hour
+
+    def _city_inputs(self, city):
+        inputs = self._inputs.get(city)
+        if inputs is None:
+            recent = FeatureCache().last_n(self.n_recent, city=city)
+            if recent.empty:
+                raise KeyError(f"No recent readings for {city}")
+            inputs = self._inputs[city] = (recent, recent_history(fallback=recent, city=city))
+        return inputs
+
+    def forecast(self, city=PRIMARY_CITY, explain=False):
+        """
+        Cached 3-day forecast for city as a JSON-serialisable dict.
+        """
+        key = (city, bool(explain))
+        with self._lock:
+            hour = self._roll_hour()
+            cached = self._responses.get(key)
+            if cached is None:
+                cached = self._responses[key] = Future()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            return cached.result() if isinstance(cached, Future) else cached
+
+        try:
+            response = self._compute(city, hour, explain, *self._city_inputs(city))
+        except Exception as e:
+            with self._lock:
+                if self._responses.get(key) is cached:
+                    del self._responses[key]
+            cached.set_exception(e)
+            raise
+
+        with self._lock:
+            if self._responses.get(key) is cached:
+                self._responses[key] = response
+        cached.set_result(response)
+        return response
+
+    def _compute(self, city, hour, with_explanations, recent, history):
+        model = load_model()
+        version = get_model_cache().version
+        # Same scenario for every response of this (city, hour)
+        seed = int(hour.timestamp()) ^ zlib.crc32(city.encode())
+        scenarios = forecast_pollutant_scenarios(recent, n_scenarios=1, seed=seed)
+        dates = forecast_dates(now=hour)
+        features = select_model_features(model, scenario_features(scenarios, dates, history))
+        preds = np.round(self.batcher.submit(features).result(), 1)
+
+        response = {
+            "city": city,
+            "forecast_hour": hour.isoformat(),
+            "model_version": version,
+            "forecast": [
+                {"date": d.strftime("%Y-%m-%d"), "aqi": float(p)} for d, p in zip(dates, preds)
+            ],
+        }
+        if with_explanations:
+            with span("shap", rows=len(features)):
+                shap_values = explain(
+                    model, features, version=version,
+                    background=lambda: FeatureCache().last_n(BACKGROUND_SIZE)
+                )
+            response.update(to_record(preds, shap_values, features, recent, model_version=version))
+        return response
+
+    def status(self):
+        with self._lock:
+            return {
+                "model_version": get_model_cache().version,
+                "forecast_hour": self._hour.isoformat() if self._hour else None,
+                "cached_responses": sum(
+                    not isinstance(r, Future) for r in self._responses.values()
+                ),
+            }
+
+    def prewarm(self, cities=(PRIMARY_CITY,)):
+        """
+        Load the model and fill the cache before the first request.
+        """
+        for city in cities:
+            try:
+                self.forecast(city, explain=True)
+            except Exception as e:
+                print(f"⚠ Prewarm failed for {city}: {e}")
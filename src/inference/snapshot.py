@@ -0,0 +1,155 @@
+import os
+import time
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+
+from src.inference.predict_aqi import (
+    get_3day_aqi, fetch_last_n_days, get_project, latest_station_readings
+)
+from src.inference.forecast_store import ForecastStore, from_record
+from src.monitoring.spans import span, traced
+
+REFRESH_INTERVAL = 15 * 60  # seconds
+MAX_FORECAST_AGE = timedelta(hours=2)
+FORECAST_API_URL = os.getenv("FORECAST_API_URL")   # e.g. http://localhost:8000
+API_TIMEOUT = 10  # seconds
+
+
+# --------------------------------------------------
+# Dashboard snapshot
+# --------------------------------------------------
+class DashboardSnapshot:
+    """
+    Everything one dashboard render needs, computed together:
+    forecast, SHAP values, future features, recent observations and
+    the latest reading per station.
+    """
+
+    def __init__(self, preds, shap_values, future_features, recent, created_at,
+                 stations=None):
+        self.preds = preds
+        self.shap_values = shap_values
+        self.future_features = future_features
+        self.recent = recent
+        self.created_at = created_at
+        self.stations = stations if stations is not None else pd.DataFrame()
+
+
+def load_stored_snapshot(max_age=MAX_FORECAST_AGE):
+    """
+    Latest precomputed forecast from the batch inference job,
+    or None if there is none or it is older than max_age.
+    """
+    try:
+        dataset_api = get_project().get_dataset_api()
+    except Exception:
+        dataset_api = None
+
+    with span("fetch", source="forecast_store"):
+        record = ForecastStore(dataset_api=dataset_api).latest()
+    if record is None:
+        return None
+    created_at = datetime.fromisoformat(record["created_at"])
+    if datetime.utcnow() - created_at > max_age:
+        return None
+
+    preds, shap_values, future_features, recent = from_record(record)
+    return DashboardSnapshot(preds, shap_values, future_features, recent, created_at)
+
+
+def load_api_snapshot(base_url=FORECAST_API_URL):
+    """
+    Forecast and explanations from the serving API (app/api.py).
+    """
+    import requests
+
+    with span("fetch", source="forecast_api"):
+        response = requests.get(
+            f"{base_url.rstrip('/')}/forecast", params={"explain": 1}, timeout=API_TIMEOUT
+        )
+        response.raise_for_status()
+        record = response.json()
+    preds, shap_values, future_features, recent = from_record(record)
+    return DashboardSnapshot(
+        preds, shap_values, future_features, recent,
+        datetime.fromisoformat(record["created_at"])
+    )
+
+
+def build_live_snapshot(n_recent=7):
+    """
+    One feature read and one model call for the whole page.
+    """
+    recent = fetch_last_n_days(n_recent)
+    preds, shap_values, future_features = get_3day_aqi(
+        return_explanations=True, last_n_days=recent
+    )
+    return DashboardSnapshot(preds, shap_values, future_features, recent, datetime.utcnow())
+
+
+@traced("dashboard_snapshot")
+def build_snapshot():
+    """
+    Prefer the serving API when FORECAST_API_URL is set, then the
+    precomputed forecast; compute live only when neither is available.
+    """
+    snapshot = None
+    if FORECAST_API_URL:
+        try:
+            snapshot = load_api_snapshot()
+        except Exception as e:
+            print(f"⚠ Forecast API unavailable, falling back: {e}")
+    if snapshot is None:
+        try:
+            snapshot = load_stored_snapshot()
+        except Exception as e:
+            print(f"⚠ Could not read stored forecast, computing live: {e}")
+    if snapshot is None:
+        snapshot = build_live_snapshot()
+
+    # The station map is optional; the forecast is served without it
+    try:
+        snapshot.stations = latest_station_readings()
+    except Exception as e:
+        print(f"⚠ Could not read station readings: {e}")
+    return snapshot
+
+
+class SnapshotProvider:
+    """
+    Shares one snapshot across all sessions and rebuilds it at most once
+    per refresh interval. Rebuilds are single-flight: concurrent callers
+    wait on the same lock and reuse the result instead of recomputing.
+    If a rebuild fails, the previous snapshot keeps being served.
+    """
+
+    def __init__(self, builder=build_snapshot, refresh_interval=REFRESH_INTERVAL):
+        self.builder = builder
+        self.refresh_interval = refresh_interval
+        self._snapshot = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def _is_fresh(self):
+        return (
+            self._snapshot is not None
+            and time.monotonic() - self._built_at < self.refresh_interval
+        )
+
+    def get(self):
+        if self._is_fresh():
+            return self._snapshot
+
+        with self._lock:
+            # Another caller may have rebuilt it while we waited
+            if self._is_fresh():
+                return self._snapshot
+            try:
+                self._snapshot = self.builder()
+                self._built_at = time.monotonic()
+            except Exception as e:
+                if self._snapshot is None:
+                    raise
+                print(f"⚠ Snapshot refresh failed, serving previous snapshot: {e}")
+            return self._snapshot
@@ -1,6 +1,12 @@
 import os
+import random
+import asyncio
+import aiohttp
 import requests
-from datetime import datetime
+import pandas as pd
+
+from src.ingestion.fetch_historical_aqi import parse_records, COLUMNS
+from src.ingestion.locations import load_locations
 
 API_KEY = os.getenv("OPENWEATHER_API_KEY")
 BASE_URL = "https://api.openweathermap.org/data/2.5/air_pollution"
@@ -8,21 +14,88 @@ BASE_URL = "https://api.openweathermap.org/data/2.5/air_pollution"
 LAT = 24.8607
 LON = 67.0011
 
+# Concurrent live fetch tuning
+MAX_CONNECTIONS = 32            # pooled connections / requests in flight
+MAX_RETRIES = 3
+TIMEOUT_SECONDS = 30
+
+
 def fetch_aqi():
     params = {"lat": LAT, "lon": LON, "appid": API_KEY}
     response = requests.get(BASE_URL, params=params)
     response.raise_for_status()
-    data = response.json()["list"][0]
-
-    # ✅ THIS RETURN MUST BE ALIGNED WITH THE FUNCTION BLOCK
-    return {
-        "city": "Karachi",
-        "timestamp": datetime.utcfromtimestamp(data["dt"]),
-        "aqi": data["main"]["aqi"],
-        "pm25": data["components"].get("pm2_5"),
-        "pm10": data["components"].get("pm10"),
-        "co": data["components"].get("co"),
-        "no2": data["components"].get("no2"),
-        "so2": data["components"].get("so2"),
-        "o3": data["components"].get("o3")
-    }
+    return parse_records(response.json(), city="Karachi")[0]
+
+
+# --------------------------------------------------
+# Concurrent fetch for every configured location
+# --------------------------------------------------
+async def fetch_location(session, semaphore, location, base_url=BASE_URL,
+                         max_retries=MAX_RETRIES):
+    """
+    Latest reading for one location, retrying with exponential backoff.
+    Honours Retry-After on HTTP 429.
+    """
+    params = {"lat": location["lat"], "lon": location["lon"]}
+    if API_KEY:
+        params["appid"] = API_KEY
+
+    for attempt in range(max_retries):
+        try:
+            async with semaphore:
+                async with session.get(base_url, params=params) as response:
+                    if response.status == 429:
+                        retry_after = float(response.headers.get("Retry-After", 2 ** attempt))
+                        await asyncio.sleep(retry_after)
+                        continue
+                    response.raise_for_status()
+                    payload = await response.json(content_type=None)
+            return parse_records(payload, city=location["name"])[:1]
+        except Exception as e:
+            if attempt == max_retries - 1:
+                raise
+            print(f"⚠ {location['name']} attempt {attempt+1}/{max_retries} failed: {e}")
+            await asyncio.sleep(2 ** attempt + random.random())
+
+    raise Exception(f"Rate limited on {location['name']} after {max_retries} attempts")
+
+
+async def fetch_locations_async(locations, max_connections=MAX_CONNECTIONS,
+                                base_url=BASE_URL):
+    """
+    Fetch all locations at once over one pooled aiohttp session.
+    Returns (records, failed_location_names); one failing location
+    does not fail the others.
+    """
+    connector = aiohttp.TCPConnector(limit=max_connections)
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT_SECONDS)
+    semaphore = asyncio.Semaphore(max_connections)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        results = await asyncio.gather(
+            *(fetch_location(session, semaphore, loc, base_url) for loc in locations),
+            return_exceptions=True
+        )
+
+    records, failed = [], []
+    for location, result in zip(locations, results):
+        if isinstance(result, Exception):
+            print(f"Error fetching latest AQI for {location['name']}: {result}")
+            failed.append(location["name"])
+            continue
+        records.extend(result)
+    return records, failed
+
+
+def fetch_latest(locations=None, max_connections=MAX_CONNECTIONS, base_url=BASE_URL):
+    """
+    Latest reading for every configured location as one DataFrame
+    (one row per location, keyed by city + timestamp).
+    """
+    locations = load_locations() if locations is None else locations
+    records, failed = asyncio.run(
+        fetch_locations_async(locations, max_connections, base_url)
+    )
+    if failed:
+        print(f"⚠ {len(failed)}/{len(locations)} location(s) failed: {', '.join(failed)}")
+    return pd.DataFrame(records, columns=COLUMNS)
@@ -1,7 +1,16 @@
 import os
+import json
+import time
+import random
+import threading
 import requests
 import pandas as pd
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+
+from src.ingestion.locations import load_locations
+from src.storage.columnar_store import write_dataset
 
 API_KEY = os.getenv("OPENWEATHER_API_KEY")
 BASE_URL = "https://api.openweathermap.org/data/2.5/air_pollution/history"
@@ -10,60 +19,357 @@ BASE_URL = "https://api.openweathermap.org/data/2.5/air_pollution/history"
 LAT = 24.8607
 LON = 67.0011
 
-def fetch_historical_aqi(start_date, end_date):
+# Backfill tuning
+WINDOW_DAYS = 7                 # days requested per API call
+MAX_WORKERS = 4                 # requests in flight at once
+REQUESTS_PER_SECOND = 5         # global rate limit across workers
+MAX_RETRIES = 3
+CHECKPOINT_PATH = "data/raw/.backfill_checkpoint"
+
+COLUMNS = ["city", "timestamp", "aqi", "pm25", "pm10", "co", "no2", "so2", "o3"]
+
+
+# --------------------------------------------------
+# HTTP helpers
+# --------------------------------------------------
+def make_session(pool_size=MAX_WORKERS):
     """
-    Fetch historical AQI and pollutant data from OpenWeather API
-    between start_date and end_date (datetime objects)
-    Returns a DataFrame
+    Build a requests Session whose connection pool is large enough
+    for every backfill worker to keep its connection alive.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces request starts at least
+    1 / requests_per_second seconds apart.
+    """
+
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def parse_records(payload, city="Karachi"):
+    """
+    Convert an OpenWeather air_pollution payload into record dicts.
+    """
+    records = []
+    for data in payload.get("list", []):
+        records.append({
+            "city": city,
+            "timestamp": datetime.utcfromtimestamp(data["dt"]),
+            "aqi": data["main"]["aqi"],
+            "pm25": data["components"].get("pm2_5"),
+            "pm10": data["components"].get("pm10"),
+            "co": data["components"].get("co"),
+            "no2": data["components"].get("no2"),
+            "so2": data["components"].get("so2"),
+            "o3": data["components"].get("o3")
+        })
+    return records
+
+
+# --------------------------------------------------
+# Time-range bookkeeping
+# --------------------------------------------------
+def merge_ranges(ranges):
+    """
+    Merge overlapping or touching [start, end] unix-second ranges.
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_ranges(start, end, covered):
+    """
+    Return the parts of [start, end] that are not inside any covered range.
+    """
+    gaps = []
+    cursor = start
+    for c_start, c_end in merge_ranges(covered):
+        if c_end < cursor:
+            continue
+        if c_start > end:
+            break
+        if c_start > cursor:
+            gaps.append([cursor, c_start - 1])
+        cursor = max(cursor, c_end + 1)
+    if cursor <= end:
+        gaps.append([cursor, end])
+    return gaps
+
+
+def split_windows(ranges, window_days=WINDOW_DAYS):
+    """
+    Split ranges into request windows of at most window_days each.
+    """
+    step = int(window_days * 86400)
+    windows = []
+    for start, end in ranges:
+        cursor = start
+        while cursor <= end:
+            w_end = min(cursor + step - 1, end)
+            windows.append((cursor, w_end))
+            cursor = w_end + 1
+    return windows
+
+
+# --------------------------------------------------
+# Checkpoint
+# --------------------------------------------------
+def load_checkpoint(checkpoint_path):
+    manifest = os.path.join(checkpoint_path, "manifest.json")
+    if not os.path.exists(manifest):
+        return []
+    with open(manifest) as f:
+        return json.load(f).get("covered", [])
+
+
+def save_checkpoint(checkpoint_path, covered):
+    os.makedirs(checkpoint_path, exist_ok=True)
+    manifest = os.path.join(checkpoint_path, "manifest.json")
+    tmp = manifest + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"covered": merge_ranges(covered)}, f)
+    os.replace(tmp, manifest)
+
+
+def save_window(checkpoint_path, window, records):
+    os.makedirs(checkpoint_path, exist_ok=True)
+    path = os.path.join(checkpoint_path, f"window_{window[0]}_{window[1]}.csv")
+    pd.DataFrame(records, columns=COLUMNS).to_csv(path, index=False)
+
+
+def load_windows(checkpoint_path, start, end):
     """
-    records = []    
-    current_date = start_date
+    Load every saved window that overlaps [start, end].
+    """
+    frames = []
+    if not os.path.isdir(checkpoint_path):
+        return frames
+    for name in os.listdir(checkpoint_path):
+        if not name.startswith("window_") or not name.endswith(".csv"):
+            continue
+        w_start, w_end = (int(x) for x in name[len("window_"):-len(".csv")].split("_"))
+        if w_end < start or w_start > end:
+            continue
+        frames.append(
+            pd.read_csv(os.path.join(checkpoint_path, name), parse_dates=["timestamp"])
+        )
+    return frames
 
-    while current_date <= end_date:
-        start_unix = int(current_date.timestamp())
-        end_unix = int((current_date + timedelta(days=1)).timestamp() - 1)
 
-        params = {
-            "lat": LAT,
-            "lon": LON,
-            "start": start_unix,
-            "end": end_unix,
-            "appid": API_KEY
-        }
+# --------------------------------------------------
+# Backfill engine
+# --------------------------------------------------
+def fetch_window(session, limiter, window, base_url=BASE_URL,
+                 lat=LAT, lon=LON, city="Karachi", max_retries=MAX_RETRIES):
+    """
+    Fetch one [start, end] window, retrying with exponential backoff.
+    Honours Retry-After on HTTP 429.
+    """
+    params = {
+        "lat": lat,
+        "lon": lon,
+        "start": window[0],
+        "end": window[1],
+        "appid": API_KEY
+    }
 
+    for attempt in range(max_retries):
+        limiter.wait()
         try:
-            response = requests.get(BASE_URL, params=params)
+            response = session.get(base_url, params=params, timeout=30)
+            if response.status_code == 429:
+                retry_after = float(response.headers.get("Retry-After", 2 ** attempt))
+                time.sleep(retry_after)
+                continue
             response.raise_for_status()
-            data_list = response.json().get("list", [])
-            for data in data_list:
-                record = {
-                    "city": "Karachi",
-                    "timestamp": datetime.utcfromtimestamp(data["dt"]),
-                                        "aqi": data["main"]["aqi"],
-                    "pm25": data["components"].get("pm2_5"),
-                    "pm10": data["components"].get("pm10"),
-                    "co": data["components"].get("co"),
-                    "no2": data["components"].get("no2"),
-                    "so2": data["components"].get("so2"),
-                    "o3": data["components"].get("o3")
-                }
-                records.append(record)
+            return parse_records(response.json(), city=city)
         except Exception as e:
-            print(f"Error fetching data for {current_date.date()}: {e}")
+            if attempt == max_retries - 1:
+                raise
+            print(f"⚠ Window {window} attempt {attempt+1}/{max_retries} failed: {e}")
+            time.sleep(2 ** attempt + random.random())
+
+    raise Exception(f"Rate limited on window {window} after {max_retries} attempts")
+
+
+def fetch_historical_aqi(start_date, end_date, window_days=WINDOW_DAYS,
+                         max_workers=MAX_WORKERS, requests_per_second=REQUESTS_PER_SECOND,
+                         checkpoint_path=None, base_url=BASE_URL, session=None,
+                         location=None):
+    """
+    Fetch historical AQI and pollutant data from OpenWeather API
+    between start_date and end_date (datetime objects)
+    Returns a DataFrame
+
+    The range is requested in multi-day windows over a pooled session,
+    with up to max_workers windows in flight. When checkpoint_path is
+    given, finished windows are saved there and a later call only
+    fetches the ranges that are still missing.
+
+    location is a {"name", "lat", "lon"} dict from load_locations();
+    it defaults to the Karachi point.
+    """
+    location = location or {"name": "Karachi", "lat": LAT, "lon": LON}
+    start = int(start_date.timestamp())
+    end = int(end_date.timestamp())
+
+    covered = load_checkpoint(checkpoint_path) if checkpoint_path else []
+    windows = split_windows(missing_ranges(start, end, covered), window_days)
+
+    own_session = session is None
+    if own_session:
+        session = make_session(max_workers)
+    limiter = RateLimiter(requests_per_second)
+
+    records = []
+    lock = threading.Lock()
+    failed = []
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(
+                    fetch_window, session, limiter, w, base_url,
+                    location["lat"], location["lon"], location["name"]
+                ): w
+                for w in windows
+            }
+            for future in as_completed(futures):
+                window = futures[future]
+                try:
+                    window_records = future.result()
+                except Exception as e:
+                    failed.append(window)
+                    print(f"Error fetching {location['name']} data for "
+                          f"{datetime.utcfromtimestamp(window[0]).date()} - "
+                          f"{datetime.utcfromtimestamp(window[1]).date()}: {e}")
+                    continue
+
+                if checkpoint_path:
+                    with lock:
+                        save_window(checkpoint_path, window, window_records)
+                        covered.append(list(window))
+                        save_checkpoint(checkpoint_path, covered)
+                records.extend(window_records)
+    finally:
+        if own_session:
+            session.close()
+
+    if failed:
+        print(f"⚠ {len(failed)} window(s) failed; re-run to fill the missing ranges.")
+
+    frames = [pd.DataFrame(records, columns=COLUMNS)]
+    if checkpoint_path:
+        frames = load_windows(checkpoint_path, start, end)
+
+    return to_frame(frames, start, end)
+
+
+def to_frame(frames, start=None, end=None):
+    """
+    Concatenate record frames, clipped to [start, end] unix seconds when given.
+    """
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+
+    df = pd.concat(frames, ignore_index=True)
+    if start is not None:
+        df = df[(df["timestamp"] >= datetime.utcfromtimestamp(start)) &
+                (df["timestamp"] <= datetime.utcfromtimestamp(end))]
+    df = df.drop_duplicates(subset=["city", "timestamp"]).sort_values("timestamp")
+    return df.reset_index(drop=True)
+
+
+def fetch_historical_locations(gaps, window_days=WINDOW_DAYS, max_workers=MAX_WORKERS,
+                               requests_per_second=REQUESTS_PER_SECOND,
+                               base_url=BASE_URL, session=None):
+    """
+    Fetch several locations' gaps at once. gaps is a list of
+    (location, start_date, end_date); the windows of every location go
+    through one thread pool, session and rate limit, so a short gap per
+    location costs about one round trip in total instead of one each.
+    Returns a DataFrame of all locations (failed windows are skipped).
+    """
+    jobs = []
+    for location, start_date, end_date in gaps:
+        start, end = int(start_date.timestamp()), int(end_date.timestamp())
+        jobs += [(location, start, end, w) for w in split_windows([[start, end]], window_days)]
+
+    own_session = session is None
+    if own_session:
+        session = make_session(max_workers)
+    limiter = RateLimiter(requests_per_second)
+
+    frames = []
+    failed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(
+                    fetch_window, session, limiter, w, base_url,
+                    location["lat"], location["lon"], location["name"]
+                ): (location, start, end, w)
+                for location, start, end, w in jobs
+            }
+            for future in as_completed(futures):
+                location, start, end, window = futures[future]
+                try:
+                    window_records = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"Error fetching {location['name']} data for "
+                          f"{datetime.utcfromtimestamp(window[0]).date()} - "
+                          f"{datetime.utcfromtimestamp(window[1]).date()}: {e}")
+                    continue
+                frames.append(to_frame([pd.DataFrame(window_records, columns=COLUMNS)], start, end))
+    finally:
+        if own_session:
+            session.close()
 
-        current_date += timedelta(days=1)
+    if failed:
+        print(f"⚠ {failed} window(s) failed; re-run to fill the missing ranges.")
+    return to_frame(frames)
 
-    df = pd.DataFrame(records)
-    return df
 
 if __name__ == "__main__":
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=180)
 
-    print("Fetching historical AQI data...")
-    df = fetch_historical_aqi(start_date, end_date)
+    frames = []
+    for location in load_locations():
+        print(f"Fetching historical AQI data for {location['name']}...")
+        frames.append(fetch_historical_aqi(
+            start_date, end_date, location=location,
+            checkpoint_path=os.path.join(CHECKPOINT_PATH, location["name"])
+        ))
+    df = pd.concat(frames, ignore_index=True)
 
-    os.makedirs("data/raw", exist_ok=True)
-    df.to_csv("data/raw/historical_aqi.csv", index=False)
+    # Typed Parquet dataset partitioned by city / month
+    write_dataset(df, "data/raw/historical_aqi")
 
     print(f"Saved {len(df)} records")
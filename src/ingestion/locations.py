@@ -0,0 +1,37 @@
+import json
+import pandas as pd
+
+from src.config.config import LOCATIONS_PATH
+
+
+# --------------------------------------------------
+# Configured ingestion points (AQI_LOCATIONS)
+# --------------------------------------------------
+def load_locations(path=LOCATIONS_PATH):
+    """
+    List of {"name", "lat", "lon"} dicts (optional "label" for display).
+    The name is stored as the `city` key of every feature row.
+    """
+    with open(path) as f:
+        locations = json.load(f)
+    names = [loc["name"] for loc in locations]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate location names in {path}")
+    return locations
+
+
+def locations_frame(locations=None):
+    """
+    Locations as a DataFrame with city, label, lat and lon columns.
+    """
+    locations = load_locations() if locations is None else locations
+    return pd.DataFrame([
+        {
+            "city": loc["name"],
+            "label": loc.get("label", loc["name"]),
+            "lat": loc["lat"],
+            "lon": loc["lon"],
+        }
+        for loc in locations
+    ])
+
@@ -0,0 +1,117 @@
+import os
+import json
+import queue
+import pandas as pd
+
+KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
+KAFKA_TOPIC = os.getenv("KAFKA_TOPIC", "aqi_readings")
+KAFKA_GROUP_ID = os.getenv("KAFKA_GROUP_ID", "aqi-feature-pipeline")
+MAX_POLL_MESSAGES = 500
+
+
+# --------------------------------------------------
+# Reading messages
+# --------------------------------------------------
+def parse_reading(value):
+    """
+    One pollutant reading from a JSON message (bytes, str or dict):
+    {"city", "timestamp" (ISO string or unix seconds), "aqi", "pm25",
+    "pm10", "co", "no2", "so2", "o3"}. Timestamps become naive UTC.
+    """
+    if isinstance(value, (bytes, str)):
+        value = json.loads(value)
+    reading = dict(value)
+    ts = reading["timestamp"]
+    ts = pd.Timestamp(ts, unit="s") if isinstance(ts, (int, float)) else pd.Timestamp(ts)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    reading["timestamp"] = ts
+    return reading
+
+
+# --------------------------------------------------
+# Sources: poll() -> list of readings, or None once the source is done
+# --------------------------------------------------
+class QueueSource:
+    """
+    In-process stand-in for the Kafka topic. Producers put reading
+    dicts (or JSON) on the queue; end() closes the stream.
+    """
+
+    def __init__(self, q=None):
+        self.queue = q if q is not None else queue.Queue()
+        self._done = False
+
+    def put(self, reading):
+        self.queue.put(reading)
+
+    def end(self):
+        self.queue.put(None)
+
+    def poll(self, timeout=1.0, max_messages=MAX_POLL_MESSAGES):
+        if self._done:
+            return None
+        readings = []
+        try:
+            item = self.queue.get(timeout=timeout)
+            while True:
+                if item is None:
+                    self._done = True
+                    break
+                readings.append(parse_reading(item))
+                if len(readings) >= max_messages:
+                    break
+                item = self.queue.get_nowait()
+        except queue.Empty:
+            pass
+        if self._done and not readings:
+            return None
+        return readings
+
+    def commit(self):
+        pass    # nothing to acknowledge in-process
+
+    def close(self):
+        pass
+
+
+class KafkaSource:
+    """
+    Consumer on KAFKA_TOPIC with manual commits: offsets are committed
+    only after the readings are in the local write buffer, so a crash
+    replays them (at-least-once; the buffer dedupes on city + timestamp).
+    """
+
+    def __init__(self, topic=KAFKA_TOPIC, bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS,
+                 group_id=KAFKA_GROUP_ID):
+        from confluent_kafka import Consumer
+
+        self.consumer = Consumer({
+            "bootstrap.servers": bootstrap_servers,
+            "group.id": group_id,
+            "enable.auto.commit": False,
+            "auto.offset.reset": "earliest",
+        })
+        self.consumer.subscribe([topic])
+        self._uncommitted = False
+
+    def poll(self, timeout=1.0, max_messages=MAX_POLL_MESSAGES):
+        readings = []
+        for message in self.consumer.consume(num_messages=max_messages, timeout=timeout):
+            self._uncommitted = True
+            if message.error():
+                print(f"⚠ Kafka error: {message.error()}")
+                continue
+            try:
+                readings.append(parse_reading(message.value()))
+            except Exception as e:
+                print(f"⚠ Skipping malformed reading at offset {message.offset()}: {e}")
+        return readings
+
+    def commit(self):
+        if self._uncommitted:
+            self.consumer.commit(asynchronous=False)
+            self._uncommitted = False
+
+    def close(self):
+        self.consumer.close()
@@ -0,0 +1,191 @@
+import os
+import sys
+import json
+import time
+import uuid
+import fnmatch
+import logging
+import cProfile
+import threading
+import tracemalloc
+from functools import wraps
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+SPAN_LOG = os.getenv("SPAN_LOG", "data/logs/spans.jsonl")   # "-" writes to stdout
+SPAN_LOG_MAX_MB = float(os.getenv("SPAN_LOG_MAX_MB", "10"))  # rotate the file past this size
+SPAN_LOG_BACKUPS = int(os.getenv("SPAN_LOG_BACKUPS", "3"))   # rotated files kept
+PROFILE_STAGE = os.getenv("PROFILE_STAGE")                 # glob, e.g. "fit" or "training.*"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+RUN_ID = uuid.uuid4().hex[:12]   # groups the spans of one process
+
+_local = threading.local()
+_write_lock = threading.Lock()
+_handlers = {}      # path -> RotatingFileHandler
+
+
+# --------------------------------------------------
+# Memory
+# --------------------------------------------------
+def peak_rss_mb():
+    """
+    Peak resident set size of this process so far, in MB.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+# --------------------------------------------------
+# JSON-lines sink
+# --------------------------------------------------
+def _file_handler(path):
+    """
+    Size-rotated handler for path: spans.jsonl, spans.jsonl.1, ... up to
+    SPAN_LOG_BACKUPS old files, so a long-lived dashboard or API does
+    not grow the log without bound.
+    """
+    handler = _handlers.get(path)
+    if handler is None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handler = _handlers[path] = RotatingFileHandler(
+            path, maxBytes=int(SPAN_LOG_MAX_MB * 2**20), backupCount=SPAN_LOG_BACKUPS,
+            delay=True
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+    return handler
+
+
+def emit(record, path=None):
+    path = path or SPAN_LOG
+    line = json.dumps(record, default=str)
+    with _write_lock:
+        if path == "-":
+            print(line, flush=True)
+            return
+        _file_handler(path).handle(logging.makeLogRecord({"msg": line}))
+
+
+# --------------------------------------------------
+# Opt-in profiling of one stage
+# --------------------------------------------------
+class StageProfiler:
+    """
+    cProfile + tracemalloc for a single span; results are dumped to
+    PROFILE_DIR as <stage>-<time>.prof and .tracemalloc files, readable
+    with pstats / snakeviz and tracemalloc.Snapshot.load.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.profile = cProfile.Profile()
+        self._started_tracemalloc = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+            self._started_tracemalloc = True
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(
+            PROFILE_DIR, f"{self.stage.replace('/', '_')}-{datetime.utcnow():%Y%m%dT%H%M%S}"
+        )
+        self.profile.dump_stats(base + ".prof")
+        snapshot.dump(base + ".tracemalloc")
+        print(f"Profile for '{self.stage}' written to {base}.prof / .tracemalloc")
+        return base
+
+
+def should_profile(stage):
+    return bool(PROFILE_STAGE) and fnmatch.fnmatch(stage, PROFILE_STAGE)
+
+
+# --------------------------------------------------
+# Spans
+# --------------------------------------------------
+class Span:
+
+    def __init__(self, stage, fields):
+        self.stage = stage
+        self.fields = dict(fields)
+
+    def set(self, **fields):
+        """
+        Attach fields (row counts, model name, ...) to the span record.
+        """
+        self.fields.update(fields)
+
+    def rows(self, df):
+        self.fields["rows"] = 0 if df is None else len(df)
+        return df
+
+
+@contextmanager
+def span(stage, **fields):
+    """
+    Time a pipeline stage and emit one JSON line when it ends:
+    stage, parent stage, seconds, peak RSS, status and any fields set
+    on the span. Spans nest per thread.
+    """
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    current = Span(stage, fields)
+    parent = stack[-1].stage if stack else None
+    stack.append(current)
+
+    profiler = StageProfiler(stage) if should_profile(stage) else None
+    if profiler:
+        profiler.start()
+    status, error = "ok", None
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        status, error = "error", f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        if profiler:
+            current.fields["profile"] = profiler.stop()
+        stack.pop()
+        emit({
+            "ts": datetime.utcnow().isoformat(),
+            "run": RUN_ID,
+            "pid": os.getpid(),
+            "stage": stage,
+            "parent": parent,
+            "seconds": round(seconds, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "status": status,
+            **({"error": error} if error else {}),
+            **current.fields,
+        })
+
+
+def traced(stage, **fields):
+    """
+    Decorator form of span().
+    """
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage, **fields):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
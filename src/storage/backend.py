@@ -0,0 +1,38 @@
+import os
+
+from src.config.config import BACKEND, LOCAL_STORE_DIR, MLFLOW_TRACKING_URI
+
+BACKENDS = ("hopsworks", "local")
+
+
+# --------------------------------------------------
+# Backend selection (AQI_BACKEND)
+# --------------------------------------------------
+def get_backend():
+    if BACKEND not in BACKENDS:
+        raise ValueError(f"Unknown AQI_BACKEND {BACKEND!r}; expected one of {BACKENDS}")
+    return BACKEND
+
+
+def login(**kwargs):
+    """
+    Project handle for the configured backend: a Hopsworks project
+    (kwargs go to hopsworks.login) or the embedded LocalProject. Both
+    expose get_feature_store() and get_dataset_api().
+    """
+    if get_backend() == "local":
+        from src.storage.local_store import LocalProject
+        return LocalProject(LOCAL_STORE_DIR)
+
+    import hopsworks
+    return hopsworks.login(**kwargs)
+
+
+def tracking_uri():
+    """
+    MLflow tracking / registry URI: DagsHub, or a directory-backed
+    file store (runs, artifacts and registered models) for "local".
+    """
+    if get_backend() == "local":
+        return "file://" + os.path.abspath(os.path.join(LOCAL_STORE_DIR, "mlruns"))
+    return MLFLOW_TRACKING_URI
@@ -0,0 +1,204 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.features.feature_engine import POLLUTANTS, TIME_FEATURES
+
+KEY_COLUMNS = ["city", "timestamp"]
+
+
+# --------------------------------------------------
+# Compact dtypes
+# --------------------------------------------------
+def apply_dtypes(df):
+    """
+    Cast to the compact storage schema: categorical city, uint8 AQI
+    and calendar fields, float32 pollutants and derived features.
+    """
+    df = df.copy()
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    if "city" in df:
+        df["city"] = df["city"].astype("category")
+    if "aqi" in df and not df["aqi"].isna().any():
+        df["aqi"] = df["aqi"].astype(np.uint8)
+    for col in TIME_FEATURES:
+        if col in df:
+            df[col] = df[col].astype(np.uint8)
+    for col in df.columns:
+        if col in KEY_COLUMNS + TIME_FEATURES + ["aqi"]:
+            continue
+        if pd.api.types.is_float_dtype(df[col]) or col in POLLUTANTS:
+            df[col] = df[col].astype(np.float32)
+    return df
+
+
+# --------------------------------------------------
+# Partition layout: <root>/city=<city>/month=<YYYY-MM>/part.parquet
+# --------------------------------------------------
+def _partition_dir(root, city, month):
+    return os.path.join(root, f"city={city}", f"month={month}")
+
+
+def list_partitions(root, cities=None, start=None, end=None):
+    """
+    (city, month, path) for partitions matching the filters; other
+    partitions are pruned without being opened.
+    """
+    if not os.path.isdir(root):
+        return []
+    start_month = pd.Timestamp(start).strftime("%Y-%m") if start is not None else None
+    end_month = pd.Timestamp(end).strftime("%Y-%m") if end is not None else None
+
+    partitions = []
+    for city_dir in sorted(os.listdir(root)):
+        if not city_dir.startswith("city="):
+            continue
+        city = city_dir[len("city="):]
+        if cities is not None and city not in cities:
+            continue
+        for month_dir in sorted(os.listdir(os.path.join(root, city_dir))):
+            if not month_dir.startswith("month="):
+                continue
+            month = month_dir[len("month="):]
+            if start_month and month < start_month:
+                continue
+            if end_month and month > end_month:
+                continue
+            path = os.path.join(root, city_dir, month_dir, "part.parquet")
+            if os.path.exists(path):
+                partitions.append((city, month, path))
+    return partitions
+
+
+def write_dataset(df, root):
+    """
+    Upsert rows into their (city, month) partitions, deduplicating on
+    (city, timestamp) with the new rows winning. Partitions not touched
+    by df are left as they are.
+    """
+    if df.empty:
+        return
+    df = apply_dtypes(df)
+    months = df["timestamp"].dt.strftime("%Y-%m")
+
+    for (city, month), part in df.groupby([df["city"].astype(str), months], observed=True):
+        part_dir = _partition_dir(root, city, month)
+        path = os.path.join(part_dir, "part.parquet")
+        part = part.drop(columns=["city"])
+        if os.path.exists(path):
+            existing = pq.read_table(path).to_pandas()
+            part = pd.concat([existing, part], ignore_index=True)
+        part = (
+            part.drop_duplicates(subset=["timestamp"], keep="last")
+            .sort_values("timestamp")
+            .reset_index(drop=True)
+        )
+
+        os.makedirs(part_dir, exist_ok=True)
+        tmp = path + ".tmp"
+        pq.write_table(pa.Table.from_pandas(part, preserve_index=False), tmp)
+        os.replace(tmp, path)
+
+
+def _slice_time_range(table, start, end):
+    """
+    Rows with start <= timestamp <= end. Partitions are written sorted
+    by timestamp, so the range is found by binary search and only those
+    rows are converted to pandas.
+    """
+    ts = table.column("timestamp").to_numpy()
+    lo = np.searchsorted(ts, start.to_datetime64(), side="left") if start is not None else 0
+    hi = np.searchsorted(ts, end.to_datetime64(), side="right") if end is not None else len(ts)
+    return table.slice(lo, max(hi - lo, 0))
+
+
+def read_dataset(root, columns=None, cities=None, start=None, end=None, memory_map=True):
+    """
+    Read a partitioned dataset with column projection, partition pruning
+    on city / month, and memory-mapped Parquet reads. `start` and `end`
+    bound the timestamp (inclusive).
+    """
+    read_columns = None
+    if columns is not None:
+        read_columns = [c for c in columns if c != "city"]
+        if "timestamp" not in read_columns:
+            read_columns.append("timestamp")
+
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+
+    tables = []
+    for city, _, path in list_partitions(root, cities, start, end):
+        table = pq.ParquetFile(path, memory_map=memory_map).read(columns=read_columns)
+        if start is not None or end is not None:
+            table = _slice_time_range(table, start, end)
+        city_col = pa.DictionaryArray.from_arrays(
+            pa.array(np.zeros(table.num_rows, dtype=np.int32)), pa.array([city])
+        )
+        tables.append(table.add_column(0, "city", city_col))
+
+    if not tables:
+        return pd.DataFrame(columns=columns or [])
+
+    # One Arrow -> pandas conversion; dictionary city becomes categorical
+    df = pa.concat_tables(tables).to_pandas()
+    if columns is not None:
+        df = df[list(columns)]
+    return df.reset_index(drop=True)
+
+
+# --------------------------------------------------
+# Path helpers (dataset directory or legacy CSV)
+# --------------------------------------------------
+def _resolve(path):
+    if not path.endswith(".csv") and not os.path.isdir(path) and os.path.exists(path + ".csv"):
+        path = path + ".csv"
+    return path
+
+
+def load_table(path, **kwargs):
+    """
+    Load a dataset directory, or a CSV when `path` ends in .csv or only
+    `<path>.csv` exists. CSV input is cast to the compact dtypes and
+    only the cities / start / end filters apply to it.
+    """
+    path = _resolve(path)
+    if path.endswith(".csv"):
+        df = apply_dtypes(pd.read_csv(path, parse_dates=["timestamp"]))
+        if kwargs.get("cities") is not None:
+            df = df[df["city"].isin(kwargs["cities"])]
+        if kwargs.get("start") is not None:
+            df = df[df["timestamp"] >= pd.Timestamp(kwargs["start"])]
+        if kwargs.get("end") is not None:
+            df = df[df["timestamp"] <= pd.Timestamp(kwargs["end"])]
+        return df.reset_index(drop=True)
+    return read_dataset(path, **kwargs)
+
+
+def table_cities(path):
+    """
+    Cities present in a dataset directory (from its partitions) or CSV.
+    """
+    path = _resolve(path)
+    if path.endswith(".csv"):
+        return sorted(pd.read_csv(path, usecols=["city"])["city"].astype(str).unique())
+    return sorted({city for city, _, _ in list_partitions(path)})
+
+
+def save_table(df, path, append=False):
+    """
+    Write a dataset directory, or a CSV when `path` ends in .csv or only
+    `<path>.csv` exists (the same rule as load_table). Dataset rows are
+    always upserted; with append=True rows are added to an existing CSV.
+    """
+    path = _resolve(path)
+    if path.endswith(".csv"):
+        if append and os.path.exists(path):
+            df.to_csv(path, mode="a", header=False, index=False)
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        df.to_csv(path, index=False)
+    else:
+        write_dataset(df, path)
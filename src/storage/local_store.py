@@ -0,0 +1,246 @@
+import os
+import json
+import shutil
+import operator
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.storage.columnar_store import read_dataset, write_dataset, list_partitions
+
+
+# --------------------------------------------------
+# Feature expressions (the subset of the Hopsworks query API we use)
+# --------------------------------------------------
+OPERATORS = {
+    ">": operator.gt, ">=": operator.ge, "<": operator.lt,
+    "<=": operator.le, "==": operator.eq, "!=": operator.ne,
+}
+
+
+class Filter:
+
+    def __init__(self, conditions):
+        self.conditions = conditions    # [(column, op, value)]
+
+    def __and__(self, other):
+        return Filter(self.conditions + other.conditions)
+
+
+class Feature:
+
+    def __init__(self, name):
+        self.name = name
+
+    def _condition(self, op, value):
+        if self.name == "timestamp":
+            value = pd.Timestamp(value)
+            if value.tzinfo is not None:
+                value = value.tz_convert(None)   # stored timestamps are naive UTC
+        return Filter([(self.name, op, value)])
+
+    def __gt__(self, value):
+        return self._condition(">", value)
+
+    def __ge__(self, value):
+        return self._condition(">=", value)
+
+    def __lt__(self, value):
+        return self._condition("<", value)
+
+    def __le__(self, value):
+        return self._condition("<=", value)
+
+    def __eq__(self, value):
+        return self._condition("==", value)
+
+    def __ne__(self, value):
+        return self._condition("!=", value)
+
+    __hash__ = object.__hash__
+
+
+# --------------------------------------------------
+# Feature groups on the partitioned Parquet store
+# --------------------------------------------------
+class LocalQuery:
+    """
+    Column projection plus filters. Timestamp bounds and city (in)equality
+    are pushed down to partition pruning and the sorted-timestamp slice
+    in read_dataset; the exact predicates are applied afterwards.
+    """
+
+    def __init__(self, fg, columns=None, conditions=()):
+        self.fg = fg
+        self.columns = columns
+        self.conditions = list(conditions)
+
+    def select(self, columns):
+        return LocalQuery(self.fg, list(columns), self.conditions)
+
+    def filter(self, condition):
+        return LocalQuery(self.fg, self.columns, self.conditions + condition.conditions)
+
+    def _pushdown(self):
+        start = end = cities = None
+        excluded = set()
+        for column, op, value in self.conditions:
+            if column == "timestamp" and op in (">", ">="):
+                start = value if start is None else max(start, value)
+            elif column == "timestamp" and op in ("<", "<="):
+                end = value if end is None else min(end, value)
+            elif column == "city" and op == "==":
+                cities = [value]
+            elif column == "city" and op == "!=":
+                excluded.add(value)
+        if excluded:
+            present = cities or sorted({city for city, _, _ in list_partitions(self.fg.path)})
+            cities = [city for city in present if city not in excluded]
+        return start, end, cities
+
+    def read(self):
+        start, end, cities = self._pushdown()
+        filter_columns = {column for column, _, _ in self.conditions}
+        columns = None
+        if self.columns is not None:
+            columns = list(dict.fromkeys(list(self.columns) + sorted(filter_columns)))
+
+        df = read_dataset(self.fg.path, columns=columns, cities=cities, start=start, end=end)
+        if df.empty:
+            return df
+        for column, op, value in self.conditions:
+            df = df[OPERATORS[op](df[column], value)]
+        if self.columns is not None:
+            df = df[list(self.columns)]
+        return df.reset_index(drop=True)
+
+
+class LocalFeatureGroup:
+    """
+    A feature group stored as a (city, month) partitioned Parquet
+    dataset, sorted by timestamp inside each partition. Inserts upsert
+    on (city, timestamp) like the online primary key in Hopsworks.
+    """
+
+    def __init__(self, path, name, version, metadata=None):
+        self.path = path
+        self.name = name
+        self.version = version
+        self.metadata = metadata or {}
+
+    def __getattr__(self, name):
+        # fg.timestamp, fg.city, ... as in the Hopsworks API
+        if name.startswith("_") or name not in self._feature_names():
+            raise AttributeError(f"Feature group {self.name!r} has no feature {name!r}")
+        return Feature(name)
+
+    def _feature_names(self):
+        """
+        Column names: the keys, every column inserted so far and, for
+        groups written before those were recorded, the stored schema.
+        """
+        names = set(self.metadata.get("primary_key", ["city", "timestamp"]))
+        names.add(self.metadata.get("event_time", "timestamp"))
+        names.update(self.metadata.get("features", []))
+        if "features" not in self.metadata:
+            for _, _, path in list_partitions(self.path)[:1]:
+                names.update(pq.read_schema(path).names)
+        return names
+
+    def select(self, columns):
+        return LocalQuery(self).select(columns)
+
+    def filter(self, condition):
+        return LocalQuery(self).filter(condition)
+
+    def read(self):
+        return LocalQuery(self).read()
+
+    def insert(self, df, write_options=None):
+        write_dataset(df, self.path)
+        features = sorted(self._feature_names() | set(df.columns))
+        if features != self.metadata.get("features"):
+            self.metadata["features"] = features
+            with open(os.path.join(self.path, "metadata.json"), "w") as f:
+                json.dump(self.metadata, f, indent=2)
+
+
+class LocalFeatureStore:
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, name, version):
+        return os.path.join(self.root, f"{name}_{version}")
+
+    def get_feature_group(self, name, version=None):
+        path = self._path(name, version)
+        meta_path = os.path.join(path, "metadata.json")
+        if not os.path.exists(meta_path):
+            raise KeyError(f"Feature group {name} v{version} does not exist")
+        with open(meta_path) as f:
+            return LocalFeatureGroup(path, name, version, json.load(f))
+
+    def create_feature_group(self, name, version=None, description="",
+                             primary_key=None, event_time=None, **kwargs):
+        path = self._path(name, version)
+        os.makedirs(path, exist_ok=True)
+        metadata = {
+            "description": description,
+            "primary_key": primary_key or ["city", "timestamp"],
+            "event_time": event_time or "timestamp",
+        }
+        with open(os.path.join(path, "metadata.json"), "w") as f:
+            json.dump(metadata, f, indent=2)
+        return LocalFeatureGroup(path, name, version, metadata)
+
+    def get_or_create_feature_group(self, name, version=None, **kwargs):
+        try:
+            return self.get_feature_group(name, version)
+        except KeyError:
+            return self.create_feature_group(name, version, **kwargs)
+
+
+# --------------------------------------------------
+# Dataset API (file upload / download)
+# --------------------------------------------------
+class LocalDatasetAPI:
+
+    def __init__(self, root):
+        self.root = root
+
+    def upload(self, local_path, remote_dir, overwrite=False):
+        target_dir = os.path.join(self.root, remote_dir)
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, os.path.basename(local_path))
+        if os.path.exists(target) and not overwrite:
+            raise FileExistsError(target)
+        shutil.copyfile(local_path, target)
+        return target
+
+    def download(self, remote_path, local_path=None, overwrite=False):
+        source = os.path.join(self.root, remote_path)
+        if not os.path.exists(source):
+            raise FileNotFoundError(remote_path)
+        local_path = local_path or os.path.basename(remote_path)
+        if os.path.exists(local_path) and not overwrite:
+            raise FileExistsError(local_path)
+        shutil.copyfile(source, local_path)
+        return local_path
+
+
+class LocalProject:
+    """
+    Stands in for a Hopsworks project: a feature store and a dataset
+    API under one local directory.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._feature_store = LocalFeatureStore(os.path.join(root, "feature_store"))
+        self._dataset_api = LocalDatasetAPI(os.path.join(root, "datasets"))
+
+    def get_feature_store(self):
+        return self._feature_store
+
+    def get_dataset_api(self):
+        return self._dataset_api
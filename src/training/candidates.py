@@ -0,0 +1,155 @@
+import os
+import tempfile
+import numpy as np
+import joblib
+import mlflow
+import mlflow.sklearn
+
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+
+from src.inference.compiled_forest import CompiledForest, COMPILED_ARTIFACT
+
+# Hyperparameters used when no search result is available
+DEFAULT_PARAMS = {
+    "RandomForest": {"n_estimators": 100},
+    "Ridge": {"alpha": 1.0},
+    "NeuralNet": {"units": (64, 32), "epochs": 20},
+}
+
+# Relative share of CPU cores each candidate can make use of
+CORE_WEIGHTS = {"RandomForest": 3, "NeuralNet": 2, "Ridge": 1}
+
+
+def evaluate(y_true, y_pred):
+    rmse = np.sqrt(mean_squared_error(y_true, y_pred))
+    mae = mean_absolute_error(y_true, y_pred)
+    r2 = r2_score(y_true, y_pred)
+    # Plain floats: metrics are logged to MLflow and memoized as JSON
+    return {"rmse": float(rmse), "mae": float(mae), "r2": float(r2)}
+
+
+# --------------------------------------------------
+# Candidate trainers: (X, y, params, n_threads) -> fitted model
+# --------------------------------------------------
+def train_random_forest(X_train, y_train, params, n_threads=1):
+    rf = RandomForestRegressor(random_state=42, n_jobs=n_threads, **params)
+    rf.fit(X_train, y_train)
+    return rf
+
+
+def train_ridge(X_train, y_train, params, n_threads=1):
+    ridge = Ridge(**params)
+    ridge.fit(X_train, y_train)
+    # Kept with the model so later runs can update it without a refit
+    ridge.sufficient_stats_ = ridge_stats(X_train, y_train)
+    return ridge
+
+
+# --------------------------------------------------
+# Ridge sufficient statistics (exact incremental updates)
+# --------------------------------------------------
+def ridge_stats(X, y):
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    return {
+        "n": len(X),
+        "sum_x": X.sum(axis=0),
+        "sum_y": y.sum(),
+        "xtx": X.T @ X,
+        "xty": X.T @ y,
+    }
+
+
+def merge_ridge_stats(a, b):
+    return {k: a[k] + b[k] for k in a}
+
+
+def solve_ridge(ridge, stats):
+    """
+    Set coef_ / intercept_ to the Ridge solution over every row folded
+    into `stats`, identical to refitting on all of them.
+    """
+    n = stats["n"]
+    x_mean = stats["sum_x"] / n
+    y_mean = stats["sum_y"] / n
+    xtx_c = stats["xtx"] - n * np.outer(x_mean, x_mean)
+    xty_c = stats["xty"] - n * x_mean * y_mean
+    coef = np.linalg.solve(xtx_c + ridge.alpha * np.eye(len(x_mean)), xty_c)
+    ridge.coef_ = coef
+    ridge.intercept_ = y_mean - x_mean @ coef
+    ridge.sufficient_stats_ = stats
+    return ridge
+
+
+def train_neural_net(X_train, y_train, params, n_threads=1):
+    # TensorFlow is only imported by the process that trains the NN
+    import tensorflow as tf
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Dense
+
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(n_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    except RuntimeError:
+        pass  # TF already initialised in this process
+
+    units = params.get("units", (64, 32))
+    layers = [Dense(units[0], activation="relu", input_shape=(X_train.shape[1],))]
+    layers += [Dense(u, activation="relu") for u in units[1:]]
+    nn = Sequential(layers + [Dense(1)])
+    nn.compile(optimizer="adam", loss="mse")
+    nn.fit(X_train, y_train, epochs=params.get("epochs", 20), verbose=0)
+    return nn
+
+
+TRAINERS = {
+    "RandomForest": train_random_forest,
+    "Ridge": train_ridge,
+    "NeuralNet": train_neural_net,
+}
+
+
+def predict(model, X):
+    return np.asarray(model.predict(X, verbose=0) if is_keras(model) else model.predict(X)).ravel()
+
+
+def is_keras(model):
+    return hasattr(model, "save") and not hasattr(model, "get_params")
+
+
+# --------------------------------------------------
+# Artifacts
+# --------------------------------------------------
+def log_model(model):
+    """
+    Log the model under "model". Forests also get their compiled
+    flat-array form in the same directory, which serving loads instead.
+    """
+    if is_keras(model):
+        from mlflow import tensorflow as mlflow_tensorflow
+        mlflow_tensorflow.log_model(model, "model")
+        return
+    mlflow.sklearn.log_model(model, "model")
+    if isinstance(model, RandomForestRegressor):
+        with tempfile.TemporaryDirectory() as tmp:
+            compiled = CompiledForest.from_sklearn(model).save(os.path.join(tmp, COMPILED_ARTIFACT))
+            mlflow.log_artifact(compiled, artifact_path="model")
+
+
+def save_artifact(name, model, directory):
+    """
+    Save a fitted candidate locally: scikit-learn as .pkl, Keras as .h5.
+    Forests are also compiled to <name>.npz next to the pickle.
+    """
+    os.makedirs(directory, exist_ok=True)
+    if is_keras(model):
+        path = os.path.join(directory, f"{name}.h5")
+        model.save(path)
+    else:
+        path = os.path.join(directory, f"{name}.pkl")
+        joblib.dump(model, path)
+        if isinstance(model, RandomForestRegressor):
+            CompiledForest.from_sklearn(model).save(os.path.join(directory, f"{name}.npz"))
+    return path
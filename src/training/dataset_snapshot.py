@@ -0,0 +1,112 @@
+import os
+import json
+import pandas as pd
+from datetime import datetime
+
+from src.config.config import FEATURE_GROUP_NAME, FEATURE_GROUP_VERSION
+from src.features.feature_cache import read_since_per_city, city_marks
+from src.training.fingerprint import data_fingerprint
+
+SNAPSHOT_DIR = f"data/snapshots/{FEATURE_GROUP_NAME}_v{FEATURE_GROUP_VERSION}"
+KEY_COLUMNS = ["city", "timestamp"]
+
+
+# --------------------------------------------------
+# Versioned training-set snapshots with delta pulls
+# --------------------------------------------------
+class SnapshotManager:
+    """
+    Local, append-only copy of the training feature group.
+
+    Each pull from the store is written once as a Parquet part. A
+    snapshot version is the content fingerprint of all rows up to that
+    pull, and the manifest records which parts make it up, so load(version)
+    returns exactly the data a past run was trained on.
+    """
+
+    def __init__(self, snapshot_dir=SNAPSHOT_DIR):
+        self.snapshot_dir = snapshot_dir
+        self.manifest_path = os.path.join(snapshot_dir, "manifest.json")
+
+    # ---------- manifest ----------
+    def versions(self):
+        if not os.path.exists(self.manifest_path):
+            return []
+        with open(self.manifest_path) as f:
+            return json.load(f)["versions"]
+
+    def latest(self):
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def _save_versions(self, versions):
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"versions": versions}, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    # ---------- reads ----------
+    def load(self, version=None):
+        """
+        Rows of `version` (default: latest), sorted by event time.
+        """
+        versions = self.versions()
+        if version is not None:
+            versions = [v for v in versions if v["version"] == version]
+            if not versions:
+                raise KeyError(f"Unknown training snapshot {version}")
+        if not versions:
+            return pd.DataFrame()
+        return self._read_parts(versions[-1]["parts"])
+
+    def _read_parts(self, parts):
+        df = pd.concat(
+            [pd.read_parquet(os.path.join(self.snapshot_dir, part)) for part in parts],
+            ignore_index=True,
+        )
+        df = df.drop_duplicates(subset=KEY_COLUMNS, keep="last")
+        return df.sort_values("timestamp").reset_index(drop=True)
+
+    # ---------- pulls ----------
+    def _event_time_marks(self, latest):
+        """
+        {city: max event time} of the latest snapshot (recomputed from
+        its parts for manifests written before marks were per city).
+        """
+        if "max_event_times" in latest:
+            return latest["max_event_times"]
+        return city_marks(self._read_parts(latest["parts"]))
+
+    def update(self, fg):
+        """
+        Pull rows newer than each city's max event time in the latest
+        snapshot (the whole group on first use) and record a new version
+        if any arrived. Returns (df, version).
+        """
+        latest = self.latest()
+        marks = self._event_time_marks(latest) if latest else {}
+        delta = read_since_per_city(fg, marks)
+
+        if delta.empty and latest:
+            print(f"Training snapshot {latest['version']} is up to date.")
+            return self.load(), latest["version"]
+
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        part = f"part-{datetime.utcnow():%Y%m%dT%H%M%S%f}.parquet"
+        delta.to_parquet(os.path.join(self.snapshot_dir, part), index=False)
+
+        parts = (latest["parts"] if latest else []) + [part]
+        df = self._read_parts(parts)
+        entry = {
+            "version": data_fingerprint(df),
+            "parts": parts,
+            "rows": len(df),
+            "max_event_times": {
+                city: ts.isoformat() for city, ts in city_marks(delta, marks).items()
+            },
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        self._save_versions(self.versions() + [entry])
+        print(f"Training snapshot {entry['version']}: +{len(delta)} rows, {len(df)} total")
+        return df, entry["version"]
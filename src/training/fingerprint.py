@@ -0,0 +1,24 @@
+import json
+import hashlib
+import pandas as pd
+
+
+def data_fingerprint(*frames):
+    """
+    Content hash of one or more DataFrames / Series (values, index and
+    column names). Equal data gives an equal fingerprint across runs.
+    """
+    digest = hashlib.sha256()
+    for frame in frames:
+        if isinstance(frame, pd.DataFrame):
+            digest.update(json.dumps(list(map(str, frame.columns))).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=True).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def config_fingerprint(config):
+    """
+    Stable hash of a JSON-serialisable config (dict order does not matter).
+    """
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
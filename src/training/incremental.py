@@ -0,0 +1,137 @@
+import os
+from datetime import datetime, timedelta
+
+import mlflow
+from mlflow.tracking import MlflowClient
+
+from src.training.candidates import (
+    evaluate, predict, is_keras, ridge_stats, merge_ridge_stats, solve_ridge
+)
+
+MODEL_NAME = "AQI_Predictor_Best"
+FULL_REBUILD_DAYS = int(os.getenv("FULL_REBUILD_DAYS", "7"))
+DRIFT_FACTOR = float(os.getenv("DRIFT_FACTOR", "1.5"))   # new RMSE / baseline RMSE
+MIN_NEW_ROWS = 12
+
+ADD_TREES = 20          # trees grown on new rows per update
+MAX_TREES = 300         # oldest trees are dropped beyond this
+FINE_TUNE_EPOCHS = 3
+
+
+# --------------------------------------------------
+# Registered model lookup
+# --------------------------------------------------
+def registered_model_info(model_name=MODEL_NAME):
+    """
+    Latest registered version with the tags of the run that produced it,
+    or None when nothing is registered yet.
+    """
+    client = MlflowClient()
+    try:
+        versions = client.search_model_versions(f"name='{model_name}'")
+    except Exception:
+        return None
+    if not versions:
+        return None
+    latest = max(versions, key=lambda v: int(v.version))
+    run = client.get_run(latest.run_id)
+    return {
+        "version": latest.version,
+        "run_id": latest.run_id,
+        "tags": run.data.tags,
+        "metrics": run.data.metrics,
+    }
+
+
+def load_registered_model(info, model_name=MODEL_NAME):
+    uri = f"models:/{model_name}/{info['version']}"
+    if info["tags"].get("candidate") == "NeuralNet":
+        from mlflow import tensorflow as mlflow_tensorflow
+        return mlflow_tensorflow.load_model(uri)
+    return mlflow.sklearn.load_model(uri)
+
+
+# --------------------------------------------------
+# Rebuild policy
+# --------------------------------------------------
+def full_rebuild_reason(info, now=None):
+    """
+    Why the next run must be a full rebuild, or None if a warm-start
+    update is allowed. Drift is checked separately on the new rows.
+    """
+    if info is None:
+        return "no registered model"
+    tags = info["tags"]
+    if "trained_until" not in tags or "candidate" not in tags:
+        return "registered model has no incremental metadata"
+    last_full = tags.get("last_full_rebuild")
+    now = now or datetime.utcnow()
+    if last_full is None or now - datetime.fromisoformat(last_full) >= timedelta(days=FULL_REBUILD_DAYS):
+        return f"scheduled full rebuild (every {FULL_REBUILD_DAYS} days)"
+    return None
+
+
+def drift_detected(info, new_rmse):
+    baseline = float(info["tags"].get("baseline_rmse", "nan"))
+    return baseline == baseline and new_rmse > DRIFT_FACTOR * max(baseline, 1e-6)
+
+
+# --------------------------------------------------
+# Warm-start updates
+# --------------------------------------------------
+def update_model(candidate, model, X_new, y_new):
+    """
+    Update a fitted model with only the new rows:
+    - RandomForest: grow ADD_TREES trees on the new rows, keep the newest MAX_TREES
+    - Ridge: fold the rows into the stored sufficient statistics and re-solve (exact)
+    - NeuralNet: fine-tune for FINE_TUNE_EPOCHS epochs
+    """
+    if candidate == "RandomForest":
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + ADD_TREES)
+        model.fit(X_new, y_new)
+        if len(model.estimators_) > MAX_TREES:
+            model.estimators_ = model.estimators_[-MAX_TREES:]
+            model.n_estimators = MAX_TREES
+        model.set_params(warm_start=False)
+        return model
+
+    if candidate == "Ridge":
+        stats = getattr(model, "sufficient_stats_", None)
+        if stats is None:
+            raise ValueError("Ridge model has no sufficient statistics; full rebuild needed")
+        return solve_ridge(model, merge_ridge_stats(stats, ridge_stats(X_new, y_new)))
+
+    if is_keras(model):
+        model.fit(X_new, y_new, epochs=FINE_TUNE_EPOCHS, verbose=0)
+        return model
+
+    raise ValueError(f"No incremental update for candidate {candidate}")
+
+
+def incremental_update(info, X_new, y_new, trained_until):
+    """
+    Score the registered model on rows it has not seen (prequential
+    error), then warm-start it on them. Returns (model, metrics, tags),
+    or (None, metrics, reason) when drift calls for a full rebuild.
+    """
+    candidate = info["tags"]["candidate"]
+    model = load_registered_model(info)
+    if hasattr(model, "feature_names_in_"):
+        X_new = X_new[list(model.feature_names_in_)]
+
+    metrics = evaluate(y_new, predict(model, X_new))
+    if drift_detected(info, metrics["rmse"]):
+        return None, metrics, (
+            f"drift: RMSE {metrics['rmse']:.4f} vs baseline {info['tags']['baseline_rmse']}"
+        )
+
+    model = update_model(candidate, model, X_new, y_new)
+    tags = {
+        "candidate": candidate,
+        "training_mode": "incremental",
+        "trained_until": trained_until,
+        "last_full_rebuild": info["tags"]["last_full_rebuild"],
+        "baseline_rmse": info["tags"]["baseline_rmse"],
+        "parent_version": info["version"],
+    }
+    return model, metrics, tags
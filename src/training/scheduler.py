@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import mlflow
+from threadpoolctl import threadpool_limits
+
+from src.training.candidates import (
+    TRAINERS, DEFAULT_PARAMS, CORE_WEIGHTS, evaluate, predict, log_model, save_artifact
+)
+from src.training.fingerprint import data_fingerprint, config_fingerprint
+from src.monitoring.spans import span
+from src.storage.backend import tracking_uri
+
+TRACKING_URI = tracking_uri()
+ARTIFACT_DIR = "data/cache/candidates"
+EVALUATION_DIR = os.path.join(ARTIFACT_DIR, "evaluations")
+PARALLEL = os.getenv("TRAINING_PARALLEL", "1") == "1"
+
+
+# --------------------------------------------------
+# Core allocation
+# --------------------------------------------------
+def allocate_cores(names, total=None):
+    """
+    Split `total` cores between candidates in proportion to CORE_WEIGHTS,
+    giving every candidate at least one core. The cores never add up to
+    more than `total`: with fewer cores than candidates each gets one,
+    and train_candidates runs them in waves of `total`.
+    """
+    total = total or os.cpu_count() or 1
+    if total <= len(names):
+        return {n: 1 for n in names}
+
+    # One core each, the rest in proportion to the weights
+    weights = {n: CORE_WEIGHTS.get(n, 1) for n in names}
+    weight_sum = sum(weights.values())
+    extra = total - len(names)
+    cores = {n: 1 + int(extra * w / weight_sum) for n, w in weights.items()}
+
+    # Hand out cores lost to rounding, heaviest candidates first
+    spare = total - sum(cores.values())
+    for n in sorted(weights, key=weights.get, reverse=True):
+        if spare <= 0:
+            break
+        cores[n] += 1
+        spare -= 1
+    return cores
+
+
+# --------------------------------------------------
+# Memoized evaluations keyed by (candidate, params, data fingerprint)
+# --------------------------------------------------
+def evaluation_key(name, params, data_fp):
+    return f"{name}-{config_fingerprint(params)}-{data_fp}"
+
+
+def load_evaluation(key, cache_dir=EVALUATION_DIR):
+    """
+    Cached result of an earlier identical fit, or None if there is none
+    or its artifact has since been removed.
+    """
+    path = os.path.join(cache_dir, f"{key}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        result = json.load(f)
+    return result if os.path.exists(result["artifact"]) else None
+
+
+def save_evaluation(key, result, cache_dir=EVALUATION_DIR):
+    # One file per key: concurrent candidate processes never share a file
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{key}.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(result, f)
+    os.replace(tmp, path)
+
+
+def reuse_evaluation(result, tags=None):
+    """
+    Return a memoized result without refitting or rescoring, refreshing
+    the tags of the MLflow run that produced it.
+    """
+    mlflow.set_tracking_uri(TRACKING_URI)
+    with mlflow.start_run(run_id=result["run_id"]):
+        mlflow.set_tags({**(tags or {}), "candidate": result["name"]})
+    print(f"{result['name']}: RMSE {result['metrics']['rmse']:.4f} (memoized, run {result['run_id']})")
+    return result
+
+
+# --------------------------------------------------
+# One candidate = one process = one MLflow run
+# --------------------------------------------------
+def run_candidate(name, X_train, y_train, X_test, y_test, params,
+                  n_threads=1, artifact_dir=ARTIFACT_DIR, tags=None, data_fp=None):
+    """
+    Train, score and log one candidate in its own MLflow run. BLAS /
+    OpenMP pools are capped at n_threads so concurrent candidates do
+    not oversubscribe the machine. `tags` are set on the run.
+
+    With `data_fp` the result is memoized under (name, params, data_fp)
+    and the artifact kept in its own directory.
+    """
+    mlflow.set_tracking_uri(TRACKING_URI)
+    start = time.perf_counter()
+    key = evaluation_key(name, params, data_fp) if data_fp else None
+    if key:
+        artifact_dir = os.path.join(artifact_dir, key)
+
+    with threadpool_limits(limits=n_threads):
+        with mlflow.start_run(run_name=name) as run:
+            with span("fit", candidate=name, rows=len(X_train), threads=n_threads):
+                model = TRAINERS[name](X_train, y_train, params, n_threads=n_threads)
+            with span("predict", candidate=name, rows=len(X_test)):
+                metrics = evaluate(y_test, predict(model, X_test))
+            mlflow.log_params({**params, "n_threads": n_threads})
+            mlflow.log_metrics(metrics)
+            mlflow.set_tags({**(tags or {}), "candidate": name})
+            log_model(model)
+            artifact = save_artifact(name, model, artifact_dir)
+
+    print(f"{name}: RMSE {metrics['rmse']:.4f} in {time.perf_counter() - start:.1f}s "
+          f"on {n_threads} thread(s)")
+    result = {
+        "name": name,
+        "metrics": metrics,
+        "params": params,
+        "artifact": artifact,
+        "run_id": run.info.run_id,
+    }
+    if key:
+        save_evaluation(key, result)
+    return result
+
+
+def train_candidates(X_train, y_train, X_test, y_test, names=None,
+                     params=None, parallel=PARALLEL, total_cores=None, tags=None):
+    """
+    Train all candidates, concurrently in a process pool when `parallel`
+    is set, and return {name: result}. Wall-clock time approaches the
+    slowest candidate instead of the sum of all of them.
+
+    Candidates already fitted with the same params on the same data are
+    served from the evaluation memo and not refit.
+    """
+    names = list(names or TRAINERS)
+    params = {n: (params or {}).get(n, DEFAULT_PARAMS[n]) for n in names}
+    data_fp = data_fingerprint(X_train, y_train, X_test, y_test)
+
+    results = {}
+    for n in names:
+        cached = load_evaluation(evaluation_key(n, params[n], data_fp))
+        if cached:
+            results[n] = reuse_evaluation(cached, tags)
+    todo = [n for n in names if n not in results]
+
+    if not parallel or len(todo) <= 1:
+        total = total_cores or os.cpu_count() or 1
+        for n in todo:
+            results[n] = run_candidate(n, X_train, y_train, X_test, y_test, params[n], total,
+                                       tags=tags, data_fp=data_fp)
+        return {n: results[n] for n in names}
+
+    total = total_cores or os.cpu_count() or 1
+    cores = allocate_cores(todo, total)
+    # spawn: TensorFlow and forked BLAS pools do not mix. At most `total`
+    # candidates run at once, so the cores in use never exceed `total`.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(len(todo), total), mp_context=context) as pool:
+        futures = {
+            n: pool.submit(
+                run_candidate, n, X_train, y_train, X_test, y_test, params[n], cores[n],
+                tags=tags, data_fp=data_fp,
+            )
+            for n in todo
+        }
+        results.update({n: f.result() for n, f in futures.items()})
+    return {n: results[n] for n in names}
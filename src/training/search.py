@@ -0,0 +1,143 @@
+import os
+import json
+import math
+import itertools
+import numpy as np
+from joblib import Parallel, delayed
+
+from src.training.candidates import TRAINERS, predict, evaluate
+from src.training.fingerprint import data_fingerprint, config_fingerprint
+
+CACHE_DIR = "data/cache/search"
+N_FOLDS = int(os.getenv("SEARCH_FOLDS", "4"))
+ETA = 3
+N_JOBS = int(os.getenv("SEARCH_JOBS", "-1"))
+
+SEARCH_SPACE = {
+    "RandomForest": {
+        "n_estimators": [100, 200],
+        "max_depth": [None, 16],
+        "min_samples_leaf": [1, 3],
+    },
+    "Ridge": {
+        "alpha": [0.01, 0.1, 1.0, 10.0, 100.0],
+    },
+    "NeuralNet": {
+        "units": [[32], [64, 32], [128, 64]],
+        "epochs": [10, 20, 40],
+    },
+}
+
+
+# --------------------------------------------------
+# Expanding-window folds (built once, shared by all candidates)
+# --------------------------------------------------
+def expanding_window_folds(n_rows, n_folds=N_FOLDS, min_train_frac=0.5):
+    """
+    [(train_end, test_end)] positional folds: fold i trains on rows
+    [0, train_end) and tests on [train_end, test_end). Most recent first.
+    """
+    start = int(n_rows * min_train_frac)
+    size = (n_rows - start) // n_folds
+    folds = [(start + i * size, start + (i + 1) * size) for i in range(n_folds)]
+    folds[-1] = (folds[-1][0], n_rows)
+    return folds[::-1]
+
+
+def grid(space):
+    keys = sorted(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+# --------------------------------------------------
+# Fold result cache keyed by data fingerprint + config
+# --------------------------------------------------
+class FoldCache:
+
+    def __init__(self, fingerprint, cache_dir=CACHE_DIR):
+        self.path = os.path.join(cache_dir, f"{fingerprint}.json")
+        self.results = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.results = json.load(f)
+
+    @staticmethod
+    def key(name, params, fold):
+        return f"{name}|{config_fingerprint(params)}|{fold[0]}-{fold[1]}"
+
+    def get(self, name, params, fold):
+        return self.results.get(self.key(name, params, fold))
+
+    def put(self, name, params, fold, rmse):
+        self.results[self.key(name, params, fold)] = rmse
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.results, f)
+        os.replace(tmp, self.path)
+
+
+def fit_score(name, params, X, y, fold):
+    train_end, test_end = fold
+    model = TRAINERS[name](X.iloc[:train_end], y.iloc[:train_end], params, n_threads=1)
+    preds = predict(model, X.iloc[train_end:test_end])
+    return float(evaluate(y.iloc[train_end:test_end], preds)["rmse"])
+
+
+# --------------------------------------------------
+# Successive halving over folds
+# --------------------------------------------------
+def successive_halving(name, X, y, folds, configs, cache, eta=ETA, n_jobs=N_JOBS):
+    """
+    Score every config on the most recent fold, keep the best 1/eta,
+    re-score survivors on eta times as many folds, and repeat until all
+    folds are used. (config, fold) pairs run in parallel and results
+    already in the cache are never recomputed.
+    """
+    alive = list(configs)
+    budget = 1
+
+    while True:
+        used = folds[:budget]
+        todo = [
+            (params, fold) for params in alive for fold in used
+            if cache.get(name, params, fold) is None
+        ]
+        scores = Parallel(n_jobs=n_jobs)(
+            delayed(fit_score)(name, params, X, y, fold) for params, fold in todo
+        )
+        for (params, fold), rmse in zip(todo, scores):
+            cache.put(name, params, fold, rmse)
+        cache.save()
+
+        ranked = sorted(
+            alive,
+            key=lambda p: np.mean([cache.get(name, p, f) for f in used])
+        )
+        if budget >= len(folds) or len(ranked) == 1:
+            best = ranked[0]
+            return best, float(np.mean([cache.get(name, best, f) for f in used]))
+
+        alive = ranked[:max(1, math.ceil(len(ranked) / eta))]
+        budget = min(budget * eta, len(folds))
+
+
+def search(X, y, names=None, n_folds=N_FOLDS, eta=ETA, n_jobs=N_JOBS, cache_dir=CACHE_DIR):
+    """
+    Tune every candidate on shared expanding-window folds.
+    Returns {name: (best_params, mean_cv_rmse)}.
+    """
+    names = list(names or SEARCH_SPACE)
+    folds = expanding_window_folds(len(X), n_folds)
+    cache = FoldCache(data_fingerprint(X, y), cache_dir)
+
+    results = {}
+    for name in names:
+        best, rmse = successive_halving(
+            name, X, y, folds, grid(SEARCH_SPACE[name]), cache, eta, n_jobs
+        )
+        print(f"Search {name}: best {best} (CV RMSE {rmse:.4f})")
+        results[name] = (best, rmse)
+    return results
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Span records go to a scratch file instead of data/logs
+os.environ.setdefault("SPAN_LOG", os.path.join(tempfile.mkdtemp(prefix="aqi-tests-"), "spans.jsonl"))
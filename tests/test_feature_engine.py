@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features.feature_engine import FeatureEngine, POLLUTANTS, load_state, save_state
+
+
+def readings(hours=72, cities=("A", "B"), missing=(30, 31, 32), seed=0):
+    """
+    Hourly readings per city with a few hours missing and some NaN values.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for city in cities:
+        ts = pd.date_range("2026-01-01", periods=hours, freq="h").delete(list(missing))
+        df = pd.DataFrame(rng.random((len(ts), len(POLLUTANTS))) * 100, columns=POLLUTANTS)
+        df.iloc[rng.random(len(df)) < 0.05, 0] = np.nan
+        df.insert(0, "timestamp", ts)
+        df.insert(0, "city", city)
+        df["aqi"] = 2
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def by_key(df):
+    return df.sort_values(["city", "timestamp"]).reset_index(drop=True)
+
+
+def test_incremental_matches_full(tmp_path):
+    engine = FeatureEngine()
+    raw = readings()
+    full, _ = engine.transform(raw)
+
+    # Split inside the gap and again later; state goes through its JSON file
+    path = str(tmp_path / "state.json")
+    parts = []
+    state = None
+    for lo, hi in [("2026-01-01", "2026-01-02 07:00"), ("2026-01-02 07:00", "2026-01-03"),
+                   ("2026-01-03", "2026-01-04")]:
+        chunk = raw[(raw["timestamp"] >= lo) & (raw["timestamp"] < hi)]
+        part, state = engine.transform(chunk, state)
+        parts.append(part)
+        save_state(state, path)
+        state = load_state(path)
+
+    incremental = pd.concat(parts, ignore_index=True)
+    pd.testing.assert_frame_equal(by_key(incremental), by_key(full), check_dtype=False)
+
+
+def test_update_matches_full():
+    engine = FeatureEngine()
+    raw = readings(hours=40, cities=("A",))
+    full, _ = engine.transform(raw)
+
+    rows, state = [], None
+    for _, row in raw.iterrows():
+        features, state = engine.update(row.to_dict(), state)
+        rows.append(features)
+    pd.testing.assert_frame_equal(
+        by_key(pd.concat(rows, ignore_index=True)), by_key(full), check_dtype=False
+    )
+
+
+def test_lags_are_in_hours_across_gaps():
+    engine = FeatureEngine()
+    raw = readings(hours=48, cities=("A",), missing=(10, 11, 12))
+    full, _ = engine.transform(raw)
+    full = full.set_index("timestamp")
+    values = raw.set_index("timestamp")["pm10"]
+
+    after_gap = pd.Timestamp("2026-01-01 13:00")
+    assert np.isnan(full.loc[after_gap, "pm10_lag_1"])
+    assert np.isnan(full.loc[after_gap, "pm10_lag_3"])
+    assert full.loc[after_gap, "pm10_lag_6"] == values[after_gap - pd.Timedelta(hours=6)]
+    assert full.loc[after_gap, "pm10_roll_3h"] == pytest.approx(values[after_gap])
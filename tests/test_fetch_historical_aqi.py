@@ -0,0 +1,130 @@
+import json
+import time
+import types
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+import src.ingestion.fetch_historical_aqi as fh
+
+DAY = 86400
+START = datetime(2026, 1, 1)
+
+
+# --------------------------------------------------
+# Stub OpenWeather history endpoint
+# --------------------------------------------------
+class StubAPI:
+    """
+    Serves hourly readings for any [start, end] query. `responses` maps
+    a window start to a list of status codes returned (and consumed)
+    before the window succeeds.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.responses = {}
+        self._lock = threading.Lock()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                start, end = int(query["start"][0]), int(query["end"][0])
+                with api._lock:
+                    api.requests.append((start, end))
+                    pending = api.responses.get(start, [])
+                    status = pending.pop(0) if pending else 200
+                if status != 200:
+                    self.send_response(status)
+                    if status == 429:
+                        self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    return
+                payload = {"list": [
+                    {"dt": t, "main": {"aqi": 2},
+                     "components": {"pm2_5": 1.0, "pm10": 2.0, "co": 3.0,
+                                    "no2": 4.0, "so2": 5.0, "o3": 6.0}}
+                    for t in range(-(-start // 3600) * 3600, end + 1, 3600)
+                ]}
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/history"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def window_starts(self):
+        return sorted(start for start, _ in self.requests)
+
+
+@pytest.fixture
+def api():
+    stub = StubAPI()
+    yield stub
+    stub.server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    # Retries and rate limiting without the real sleeps
+    monkeypatch.setattr(fh, "time", types.SimpleNamespace(
+        sleep=lambda seconds: None, monotonic=time.monotonic
+    ))
+
+
+def fetch(api, days, checkpoint_path):
+    end = datetime.utcfromtimestamp(START.timestamp() + days * DAY - 1)
+    return fh.fetch_historical_aqi(
+        START, end, window_days=1, base_url=api.url, checkpoint_path=checkpoint_path
+    )
+
+
+# --------------------------------------------------
+# Windowed backfill
+# --------------------------------------------------
+def test_resume_skips_checkpointed_windows(api, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint")
+    first = fetch(api, 2, checkpoint)
+    assert len(api.requests) == 2
+
+    api.requests.clear()
+    df = fetch(api, 4, checkpoint)
+    start = int(START.timestamp())
+    assert api.window_starts() == [start + 2 * DAY, start + 3 * DAY]
+    assert len(df) == 4 * 24
+    assert df["timestamp"].is_unique
+    assert df.head(len(first))["timestamp"].tolist() == first["timestamp"].tolist()
+
+
+def test_rate_limited_window_is_retried(api, tmp_path):
+    start = int(START.timestamp())
+    api.responses[start] = [429]
+
+    df = fetch(api, 2, str(tmp_path / "checkpoint"))
+    assert api.window_starts() == [start, start, start + DAY]
+    assert len(df) == 2 * 24
+
+
+def test_failed_window_is_fetched_on_next_call(api, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint")
+    start = int(START.timestamp())
+    api.responses[start + DAY] = [500] * fh.MAX_RETRIES
+
+    df = fetch(api, 3, checkpoint)
+    assert len(df) == 2 * 24
+
+    api.requests.clear()
+    df = fetch(api, 3, checkpoint)
+    assert api.window_starts() == [start + DAY]
+    assert len(df) == 3 * 24
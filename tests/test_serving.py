@@ -0,0 +1,64 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.inference.serving import MicroBatcher
+
+
+class CountingModel:
+    """
+    predict() returns each row's `x`, counting calls and rows per call.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def predict(self, X):
+        with self._lock:
+            self.calls.append(len(X))
+        return X["x"].to_numpy() * 1.0
+
+
+def test_concurrent_requests_are_coalesced():
+    model = CountingModel()
+    batcher = MicroBatcher(predict=model.predict, max_batch=64, max_wait=0.2)
+    n_requests = 20
+    results = {}
+    start = threading.Barrier(n_requests)
+
+    def request(i):
+        frame = pd.DataFrame({"x": np.arange(3) + 10 * i})
+        start.wait()
+        results[i] = batcher.submit(frame).result(timeout=5)
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(n_requests)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Every caller gets its own rows back, from far fewer predict calls
+    for i in range(n_requests):
+        np.testing.assert_array_equal(results[i], np.arange(3) + 10 * i)
+    assert sum(model.calls) == 3 * n_requests
+    assert len(model.calls) < n_requests / 2
+
+
+def test_batch_size_is_capped():
+    model = CountingModel()
+    batcher = MicroBatcher(predict=model.predict, max_batch=4, max_wait=0.2)
+    futures = [batcher.submit(pd.DataFrame({"x": [i]})) for i in range(10)]
+    assert [f.result(timeout=5)[0] for f in futures] == list(range(10))
+    assert max(model.calls) <= 4
+
+
+def test_predict_errors_reach_every_caller():
+    def fail(X):
+        raise ValueError("bad features")
+
+    batcher = MicroBatcher(predict=fail, max_wait=0.05)
+    futures = [batcher.submit(pd.DataFrame({"x": [i]})) for i in range(3)]
+    for f in futures:
+        assert isinstance(f.exception(timeout=5), ValueError)
@@ -0,0 +1,60 @@
+import pandas as pd
+
+from src.features.write_buffer import WriteBuffer
+
+
+class FlakyFeatureGroup:
+    """
+    Records inserted rows; the first `failures` inserts raise.
+    """
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.inserted = []
+
+    def insert(self, df, write_options=None):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("store unavailable")
+        self.inserted.append(df.copy())
+
+
+def rows(hours, aqi, city="A"):
+    return pd.DataFrame({
+        "city": city,
+        "timestamp": pd.date_range("2026-01-01", periods=hours, freq="h"),
+        "aqi": aqi,
+    })
+
+
+def test_pending_rows_are_deduplicated_last_write_wins(tmp_path):
+    buffer = WriteBuffer(str(tmp_path / "pending"))
+    buffer.append(rows(3, aqi=1))
+    buffer.append(rows(5, aqi=2))           # replays the first three hours
+    buffer.append(rows(2, aqi=3, city="B"))
+
+    pending = buffer.pending()
+    assert len(pending) == 7
+    assert (pending[pending["city"] == "A"]["aqi"] == 2).all()
+
+    fg = FlakyFeatureGroup()
+    assert buffer.flush(fg)
+    inserted = pd.concat(fg.inserted, ignore_index=True)
+    assert len(inserted) == 7
+    assert not inserted.duplicated(subset=["city", "timestamp"]).any()
+    assert buffer.pending().empty
+
+
+def test_failed_flush_keeps_rows_for_the_next_run(tmp_path):
+    buffer = WriteBuffer(str(tmp_path / "pending"))
+    buffer.append(rows(4, aqi=1))
+
+    fg = FlakyFeatureGroup(failures=2)
+    assert not buffer.flush(fg, max_attempts=2, base_delay=0, max_delay=0)
+    assert len(buffer.pending()) == 4
+
+    buffer.append(rows(4, aqi=2))
+    assert buffer.flush(fg, max_attempts=2, base_delay=0, max_delay=0)
+    inserted = pd.concat(fg.inserted, ignore_index=True)
+    assert len(inserted) == 4
+    assert (inserted["aqi"] == 2).all()